@@ -1,16 +1,17 @@
 from pathlib import Path
 import json
 import streamlit as st
-import pandas as pd
 import time
 
-from scripts.scoring_grid import run_profile, load_profiles_json
-from scripts.make_map import make_map
+from scripts.scoring_grid import run_profile, load_profiles_json, export_outputs_async, score_surface
+from scripts.scoring_engine import ScoringEngine
+from scripts.make_map import MAP_RENDER, make_map_html
+from core.result_cache import ResultCache, result_key
+from core.map_tiles import TILE_CELL_KM, load_tile_meta, tiles_key
+from core.score_raster import image_bounds, score_png
 
 
 BASE_DIR = Path(__file__).resolve().parent
-OUT_MAPS = BASE_DIR / "outputs" / "maps"
-OUT_MAPS.mkdir(parents=True, exist_ok=True)
 
 st.set_page_config(page_title="Ev Yaşam Öneri Sistemi", layout="wide")
 st.title("Ev Yaşam Öneri Sistemi (İstanbul)")
@@ -33,6 +34,9 @@ CATEGORIES = [
     "parking_main",
     "cafe_main",
     "bar_main",
+    "mosque_main",
+    "theatre_main",
+    "convenience_main",
 ]
 
 CATEGORY_LABELS = {
@@ -48,9 +52,15 @@ CATEGORY_LABELS = {
     "parking_main": "Otopark",
     "cafe_main": "Kafe",
     "bar_main": "Bar",
+    "mosque_main": "Cami",
+    "theatre_main": "Tiyatro",
+    "convenience_main": "Bakkal / Market",
 }
 
 
+# "En yakını önemli" seçilen kategorilerin mesafe teriminin ağırlığı
+NEAREST_WEIGHT = 3
+
 PROFILE_LABELS = {
     "student": "Öğrenci",
     "family_with_children": "Çocuklu Aile",
@@ -78,11 +88,93 @@ def semt_from_coord(lat, lon):
     return "Anadolu Yakası (Doğu)"
 
 
-@st.cache_data(show_spinner=False)
-def cached_run_profile(profile_json: str, cell_km: float, top_n: int):
+# veri dosyaları (csv) kaç saniyede bir yoklanıyor
+ENGINE_STALE_CHECK_S = 60
+
+
+@st.cache_resource(show_spinner="Skorlama motoru hazırlanıyor...")
+def load_engine() -> ScoringEngine:
+    # process başına bir kere: POI'ler, indeksler ve mesafe küpleri RAM'de kalıyor
+    return ScoringEngine()
+
+
+@st.cache_data(ttl=ENGINE_STALE_CHECK_S, show_spinner=False)
+def engine_is_stale(engine_version: str) -> bool:
+    # dosya sistemine bakıyor; TTL sayesinde sıcak yolda dakikada en fazla bir kere
+    return load_engine().is_stale()
+
+
+def get_engine() -> ScoringEngine:
+    """
+    Motor + tazelik kontrolü: csv'ler yeniden üretildiyse (data_version değişti)
+    motor baştan kuruluyor; yeni versiyon sonuç cache anahtarlarına da giriyor.
+    """
+    engine = load_engine()
+    if engine_is_stale(engine.data_version):
+        load_engine.clear()
+        engine_is_stale.clear()
+        engine = load_engine()
+    return engine
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    # içerik adresli (profil + ayarlar + veri versiyonu) sonuç cache'i, tüm oturumlar ortak
+    return ResultCache()
+
+
+def result_cache_key(profile: dict, cell_km: float, top_n: int, **extra) -> str:
+    return result_key(profile, cell_km, top_n, get_engine().data_version, **extra)
+
+
+def cached_run_profile(profile_json: str, cell_km: float, top_n: int, export: bool = False):
+    # Önce içerik adresli cache; yoksa motor sayımları RAM'den veriyor,
+    # sadece ağırlık çarpımı yapılıyor. Sonuç direkt DataFrame, diske yazmak opsiyonel (arka planda).
     profile = json.loads(profile_json)
-    out_csv, out_geo = run_profile(profile, cell_km=cell_km, top_n=top_n)
-    return str(out_csv), str(out_geo)
+    cache = get_result_cache()
+    key = result_cache_key(profile, cell_km, top_n)
+
+    df = cache.get_frame(key)
+    if df is None:
+        df = run_profile(
+            profile,
+            cell_km=cell_km,
+            top_n=top_n,
+            engine=get_engine(),
+            in_memory=True,
+            export=False,
+        )
+        cache.put_frame(key, df)
+    if export:
+        # dosya adı = sonuç anahtarı: "custom" kullanıcılar aynı dosyayı ezmiyor
+        export_outputs_async(df, profile.get("profile_id", "custom"), cache=cache, key=key)
+    return df
+
+
+def cached_score_overlay(profile: dict, cell_km: float) -> tuple[bytes, list]:
+    # tüm grid'in skor yüzeyi (png + sınırlar); top_n'den bağımsız, sonuç anahtarıyla cache'li
+    cache = get_result_cache()
+    key = result_cache_key(profile, cell_km, 0, kind="raster")
+    engine = get_engine()
+
+    hit = cache.get_path(key, ".png")
+    if hit is not None:
+        png = hit.read_bytes()
+    else:
+        cell_id, scores = score_surface(profile, cell_km=cell_km, engine=engine)
+        png = score_png(engine.grid(cell_km), cell_id, scores)
+        cache.put_bytes(key, ".png", png)
+    return png, image_bounds(engine.grid(cell_km))
+
+
+def preset_score_tiles(profile: dict, cell_km: float) -> dict | None:
+    # preset'in offline üretilmiş tile piramidi (scripts/build_preset_tiles.py); yoksa / eskiyse None.
+    # piramit TILE_CELL_KM grid'inden: başka cell_km seçiliyken yüzey tablo/dairelerle uyuşmaz
+    if float(cell_km) != TILE_CELL_KM:
+        return None
+    engine = get_engine()
+    key = tiles_key(profile, engine.data_version, engine.grid(TILE_CELL_KM).mask_tag)
+    return load_tile_meta(profile.get("profile_id", "custom"), key=key)
 
 
 def build_custom_profile() -> dict:
@@ -102,6 +194,13 @@ def build_custom_profile() -> dict:
         format_func=lambda x: CATEGORY_LABELS.get(x, x)
     )
 
+    # sayıdan bağımsız: en yakınındaki mesafe de puana girsin (örn. en yakın hastane)
+    nearest = st.sidebar.multiselect(
+        "En yakını önemli",
+        CATEGORIES,
+        format_func=lambda x: CATEGORY_LABELS.get(x, x)
+    )
+
     st.sidebar.caption("Ağırlıklar: -2 (istemem) → +5 (çok isterim)")
     weights = {}
     for cat in CATEGORIES:
@@ -127,6 +226,8 @@ def build_custom_profile() -> dict:
         profile["must_have"] = must_have
     if avoid:
         profile["avoid"] = avoid
+    if nearest:
+        profile["nearest"] = {cat: NEAREST_WEIGHT for cat in nearest}
 
     return profile
 
@@ -183,6 +284,16 @@ map_n = st.sidebar.slider(
     step=50
 )
 
+show_surface = st.sidebar.checkbox(
+    "Tüm şehir skor yüzeyini göster (ısı haritası)",
+    value=False
+)
+
+export_files = st.sidebar.checkbox(
+    "Sonuçları diske de yaz (CSV/GeoJSON)",
+    value=False
+)
+
 
 if st.button("Skorla ve Haritayı Göster"):
     t0 = time.time()
@@ -190,19 +301,20 @@ if st.button("Skorla ve Haritayı Göster"):
     profile_json = json.dumps(profile, ensure_ascii=False, sort_keys=True)
 
     with st.spinner("Skorlama yapılıyor..."):
-        out_csv_str, out_geo_str = cached_run_profile(
+        df = cached_run_profile(
             profile_json,
             float(cell_km),
-            int(top_n)
+            int(top_n),
+            bool(export_files)
         )
 
-    out_csv = Path(out_csv_str)
-    out_geo = Path(out_geo_str)
-
     st.info(f"Skorlama süresi: {time.time() - t0:.1f} sn")
+    if export_files:
+        out_csv = get_result_cache().path(result_cache_key(profile, float(cell_km), int(top_n)), ".csv")
+        st.caption(f"CSV/GeoJSON (arka planda yazılıyor): {out_csv.with_suffix('')}.*")
+    st.caption(f"Skorlama motoru bellek kullanımı: {get_engine().memory_usage()['total'] / 1e6:.1f} MB")
 
     # TOP-20
-    df = pd.read_csv(out_csv)
     top20 = df.head(20).copy()
     top20.insert(0, "rank", range(1, 21))
     top20["semt"] = top20.apply(
@@ -220,23 +332,36 @@ if st.button("Skorla ve Haritayı Göster"):
         ["rank", "latitude", "longitude", "score_total"]
     ].to_dict(orient="records")
 
-    # Map
-    out_html = OUT_MAPS / f"map_{profile.get('profile_id', 'custom')}.html"
+    # Map: taban şablon process başına bir kere render ediliyor,
+    # burada sadece veri (noktalar, yarıçap, yüzey) JSON olarak yerleşiyor; dosya yok
     t1 = time.time()
 
     with st.spinner("Harita hazırlanıyor..."):
-        make_map(
-            geojson_path=out_geo,
-            out_html=out_html,
+        # skor yüzeyi: preset'in statik tile'ları varsa (ve grid'i aynıysa) onlar, yoksa tek PNG overlay
+        score_tiles = preset_score_tiles(profile, float(cell_km)) if show_surface else None
+        overlay = None
+        if show_surface and score_tiles is None:
+            overlay = cached_score_overlay(profile, float(cell_km))
+        map_html = make_map_html(
+            geojson_path=None,
+            scored_df=df,
             top_points=top_points,
             top_n=int(map_n),
-            radius_m=int(profile.get("radius_m", 1000))
+            radius_m=int(profile.get("radius_m", 1000)),
+            render=MAP_RENDER,
+            overlay=overlay,
+            score_tiles=score_tiles,
         )
 
     st.info(f"Harita üretim süresi: {time.time() - t1:.1f} sn")
+    stats = get_result_cache().stats()
+    st.caption(
+        f"Sonuç cache: {stats['hits']} hit / {stats['misses']} miss | "
+        f"{stats['entries']} dosya, {stats['bytes'] / 1e6:.1f} MB"
+    )
 
     st.components.v1.html(
-        out_html.read_text(encoding="utf-8"),
+        map_html,
         height=700,
         scrolling=True
     )
@@ -0,0 +1,71 @@
+# core/breakdown.py
+"""
+Skor kırılımı (kategori başına katkı) için kolon bazlı görünüm.
+
+Eskiden her hücre için dict kurup json.dumps ile "score_breakdown"
+yazısı üretiyorduk; GeoJSON'a da aynı yazı tekrar gömülüyordu.
+Artık katkılar sayısal kolonlarda duruyor:
+
+    contrib_<kategori>  (float32)
+
+dict / json hali sadece biri belirli satırları isteyince üretiliyor
+(BreakdownView). Sayımlar zaten <kategori>_count kolonlarında.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+
+CONTRIB_PREFIX = "contrib_"
+COUNT_SUFFIX = "_count"
+
+
+def contrib_column(cat: str) -> str:
+    return f"{CONTRIB_PREFIX}{cat}"
+
+
+class BreakdownView:
+    """
+    Skor tablosu üzerinde tembel kırılım görünümü.
+    view[i] -> {kategori: katkı}, view.json(i) -> aynı şeyin json hali,
+    view.counts(i) -> {kategori: sayım} (generate_explanation bunu bekliyor).
+    i: satır pozisyonu (0 = en iyi hücre).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.columns = [c for c in df.columns if c.startswith(CONTRIB_PREFIX)]
+        self.categories = [c[len(CONTRIB_PREFIX):] for c in self.columns]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __getitem__(self, i: int) -> dict:
+        return self.dict(i)
+
+    def matrix(self, rows=None) -> np.ndarray:
+        """
+        (satır x kategori) float32 katkı matrisi; rows verilirse sadece o satırlar.
+        """
+        values = self.df[self.columns].to_numpy(dtype=np.float32)
+        return values if rows is None else values[np.asarray(rows)]
+
+    def dict(self, i: int) -> dict:
+        row = self.df.iloc[int(i)]
+        return {cat: float(row[col]) for cat, col in zip(self.categories, self.columns)}
+
+    def json(self, i: int) -> str:
+        return json.dumps(self.dict(i), ensure_ascii=False)
+
+    def counts(self, i: int) -> dict:
+        row = self.df.iloc[int(i)]
+        return {
+            cat: int(row[f"{cat}{COUNT_SUFFIX}"])
+            for cat in self.categories
+            if f"{cat}{COUNT_SUFFIX}" in self.df.columns
+        }
+
+    def records(self, rows) -> list[dict]:
+        return [self.dict(i) for i in rows]
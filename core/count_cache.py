@@ -0,0 +1,214 @@
+# core/count_cache.py
+"""
+Grid x kategori sayım matrisi (G x C) için kalıcı cache.
+
+Ağırlık slider'ı her oynadığında profil değişiyor ama
+(kategori seti, yarıçap, cell_km, veri versiyonu) aynı kaldıkça
+hücre başına POI sayıları hiç değişmiyor. O yüzden:
+- sayım matrisini (counts) ve doygunlaştırılmış halini (saturated)
+  bir kere hesaplayıp diske .npz olarak yazıyoruz
+- yeni ağırlıklar = sadece matris x vektör + must_have/avoid maskeleri
+- disk tarafı da sınırlı: dosyanın mtime'ı son kullanım, sınır aşılınca en eski
+  kullanılanlar siliniyor (core.result_cache.ResultCache ile aynı LRU)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+CACHE_DIR = BASE_DIR / "outputs" / "cache" / "counts"
+
+
+class CountMatrix:
+    """
+    Bir grid için kategori sayımları.
+    counts[:, j] -> categories[j] için hücre başına POI sayısı
+    saturated[:, j] -> aynı sayımın saturating_score hali
+    """
+
+    def __init__(self, categories, latitude, longitude, counts, saturated, cell_id=None):
+        self.categories = [str(c) for c in categories]
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        # grid hücre id'leri (core.grid.Grid.cell_id); farklı profiller bununla eşleşiyor
+        if cell_id is None:
+            cell_id = np.arange(len(self.latitude))
+        self.cell_id = np.asarray(cell_id, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int32).reshape(len(self.latitude), len(self.categories))
+        self.saturated = np.asarray(saturated, dtype=np.float64).reshape(self.counts.shape)
+        self._col = {c: j for j, c in enumerate(self.categories)}
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    def __contains__(self, cat: str) -> bool:
+        return cat in self._col
+
+    def col(self, cat: str) -> int:
+        return self._col[cat]
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.latitude.nbytes
+            + self.longitude.nbytes
+            + self.cell_id.nbytes
+            + self.counts.nbytes
+            + self.saturated.nbytes
+        )
+
+    def save(self, path: Path) -> None:
+        # önce geçici dosyaya yaz, sonra rename: yarım dosya okunmasın.
+        # geçici isim yazan başına tekil (streamlit oturumları aynı process'te thread)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp.npz")
+        try:
+            np.savez(
+                tmp,
+                categories=np.array(self.categories),
+                latitude=self.latitude,
+                longitude=self.longitude,
+                cell_id=self.cell_id,
+                counts=self.counts,
+                saturated=self.saturated,
+            )
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    @classmethod
+    def load(cls, path: Path) -> "CountMatrix":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                z["categories"].tolist(),
+                z["latitude"],
+                z["longitude"],
+                z["counts"],
+                z["saturated"],
+                cell_id=z["cell_id"],
+            )
+
+
+def matrix_key(
+    categories,
+    radius_m: int,
+    cell_km: float,
+    data_version: str,
+    bbox=None,
+    mode: str = "exact",
+    mask: str = "",
+    grid_kind: str = "square",
+) -> str:
+    """
+    (kategori seti, yarıçap, cell_km, veri versiyonu, grid bbox'u, mesafe modu, maske, grid tipi) -> kısa hash.
+    Kategori sırası önemli değil, set olarak bakıyoruz.
+    Varsayılanlar (exact, maskesiz, kare) anahtara girmiyor (eski cache dosyaları geçerli kalsın).
+    """
+    payload = {
+        "categories": sorted(categories),
+        "radius_m": int(radius_m),
+        "cell_km": float(cell_km),
+        "data_version": data_version,
+        "bbox": [float(x) for x in bbox] if bbox is not None else None,
+    }
+    if mode != "exact":
+        payload["mode"] = mode
+    if mask:
+        payload["mask"] = mask
+    if grid_kind != "square":
+        payload["grid_kind"] = grid_kind
+    raw = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+class CountMatrixCache:
+    """
+    İki katmanlı cache: önce RAM (küçük LRU), sonra disk (.npz, mtime LRU).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        max_in_memory: int = 16,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_entries: int = 500,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_in_memory = max_in_memory
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.evictions = 0
+        self._mem: "OrderedDict[str, CountMatrix]" = OrderedDict()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"counts_{key}.npz"
+
+    def get(self, key: str) -> CountMatrix | None:
+        m = self._mem.get(key)
+        if m is not None:
+            self._mem.move_to_end(key)
+            return m
+
+        path = self._path(key)
+        try:
+            os.utime(path)  # LRU: son kullanım
+        except FileNotFoundError:
+            return None
+        try:
+            m = CountMatrix.load(path)
+        except (OSError, ValueError, KeyError):
+            # bozuk/yarım dosya: yok say, yeniden hesaplanır
+            return None
+        self._remember(key, m)
+        return m
+
+    def put(self, key: str, matrix: CountMatrix) -> None:
+        matrix.save(self._path(key))
+        self._remember(key, matrix)
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for p in self.cache_dir.glob("counts_*.npz"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Disk sınırı aşıldıysa en eski kullanılan .npz'lerden başlayarak sil
+        (RAM'deki kopyalar kalıyor, zaten LRU).
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, p = entries.pop(0)
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def _remember(self, key: str, matrix: CountMatrix) -> None:
+        self._mem[key] = matrix
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_in_memory:
+            self._mem.popitem(last=False)
+
+    def clear_memory(self) -> None:
+        self._mem.clear()
@@ -0,0 +1,117 @@
+# core/distance_cube.py
+"""
+Yarıçaptan bağımsız komşu-mesafe yapısı ("distance cube").
+
+App'teki "Mesafe yarıçapı (m)" slider'ı 300-3000 m arasında.
+Her hücre için MAX_RADIUS_M içindeki tüm POI mesafelerini bir kere,
+satır içinde sıralı şekilde CSR düzeninde saklıyoruz:
+
+    indptr[i] : indptr[i + 1]  -> i. hücrenin mesafeleri (artan sırada)
+
+Sonra herhangi bir yarıçap için sayım, hücre başına "kaç mesafe <= r?"
+sorusu oluyor; mesafeleri yeniden hesaplamaya gerek kalmıyor.
+
+Birleşik indeksle (core.spatial_index.UnionIndex) kurulursa satırlar
+(hücre, kategori) çiftleri oluyor: satır = hücre * C + kategori kodu.
+Sayım yine aynı kümülatif toplam, sonuç (hücre x kategori) matrisi.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+
+# app.py slider üst sınırı ile aynı
+MAX_RADIUS_M = 3000
+
+# Aynı anda RAM'de tutulacak küp sayısı (kategori x grid)
+CUBE_CACHE_MAX = 32
+
+
+class DistanceCube:
+    """
+    Bir kategori + bir grid için sıralı mesafe listeleri (CSR).
+    """
+
+    def __init__(
+        self, indptr: np.ndarray, dist: np.ndarray, max_radius_m: float = MAX_RADIUS_M, n_categories: int = 1
+    ):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.dist = np.asarray(dist, dtype=np.float64)
+        self.max_radius_m = float(max_radius_m)
+        self.n_categories = int(n_categories)
+
+    @classmethod
+    def build(cls, index, lat, lon, max_radius_m: float = MAX_RADIUS_M) -> "DistanceCube":
+        """
+        index: core.spatial_index indekslerinden biri (query_pairs olan)
+        ya da UnionIndex (kategori kodlarıyla).
+        lat/lon: grid hücre merkezleri.
+        """
+        lat = np.asarray(lat, dtype=float)
+        cell_idx, poi_idx, dist = index.query_pairs(lat, lon, max_radius_m)
+
+        codes = getattr(index, "codes", None)
+        n_cat = 1 if codes is None else index.n_categories
+        row = cell_idx if codes is None else cell_idx * n_cat + codes[poi_idx]
+
+        # önce satıra, satır içinde mesafeye göre sırala
+        order = np.lexsort((dist, row))
+        dist = dist[order]
+        counts = np.bincount(row, minlength=len(lat) * n_cat)
+
+        indptr = np.zeros(len(lat) * n_cat + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(indptr, dist, max_radius_m, n_categories=n_cat)
+
+    @property
+    def n_cells(self) -> int:
+        return (len(self.indptr) - 1) // self.n_categories
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.indptr.nbytes + self.dist.nbytes)
+
+    def counts(self, radius_m: float) -> np.ndarray:
+        """
+        Hücre başına radius_m içindeki POI sayısı.
+        Satırlar sıralı olduğu için her satırdaki sayı, o satırda
+        searchsorted(r, side="right") ile aynı; bunu tüm satırlar için
+        tek bir kümülatif toplamla vektörel yapıyoruz.
+        Birleşik küpte satır başına, yani (hücre, kategori) başına: bkz. count_matrix.
+        """
+        if radius_m > self.max_radius_m:
+            raise ValueError(f"radius_m={radius_m} küpün sınırını aşıyor ({self.max_radius_m} m)")
+
+        within = np.concatenate([[0], np.cumsum(self.dist <= radius_m)])
+        return (within[self.indptr[1:]] - within[self.indptr[:-1]]).astype(np.int64)
+
+    def count_matrix(self, radius_m: float) -> np.ndarray:
+        """
+        (hücre x kategori) sayımlar; tek kategorili küpte (hücre x 1).
+        """
+        return self.counts(radius_m).reshape(self.n_cells, self.n_categories)
+
+
+_CUBE_CACHE: "OrderedDict[tuple, DistanceCube]" = OrderedDict()
+
+
+def get_cube(key: tuple, build_fn) -> DistanceCube:
+    """
+    Küçük bir LRU: aynı (kategori, grid) için küpü bir kere kuruyoruz.
+    build_fn sadece cache'te yoksa çağrılıyor.
+    """
+    cube = _CUBE_CACHE.get(key)
+    if cube is not None:
+        _CUBE_CACHE.move_to_end(key)
+        return cube
+
+    cube = build_fn()
+    _CUBE_CACHE[key] = cube
+    while len(_CUBE_CACHE) > CUBE_CACHE_MAX:
+        _CUBE_CACHE.popitem(last=False)
+    return cube
+
+
+def clear_cube_cache() -> None:
+    _CUBE_CACHE.clear()
@@ -12,6 +12,9 @@ POI_LABELS = {
     "hospital_main": "hastane",
     "mall_main": "AVM",
     "parking_main": "otopark",
+    "mosque_main": "cami",
+    "theatre_main": "tiyatro",
+    "convenience_main": "bakkal/market",
 }
 
 
@@ -19,6 +22,7 @@ def generate_explanation(breakdown: dict, weights: dict, max_items: int = 6) ->
     """
     breakdown: {"park_main": 3, ...}  (sayım)
     weights: {"park_main": 4, ...}    (ağırlık)
+    Skor tablosundan almak için: BreakdownView(df).counts(i)  (core/breakdown.py)
     """
     if not isinstance(breakdown, dict) or not breakdown:
         return "Bu nokta için açıklama üretilemedi (POI sayımları boş)."
@@ -0,0 +1,202 @@
+# core/grid.py
+"""
+Sabit şehir bbox'u üzerinde kare grid.
+
+Eskiden grid, o anki profilin POI'lerinin bbox'undan while döngüleriyle
+kuruluyordu; kategori seti değişince hücreler de kayıyordu.
+Burada:
+- bbox sabit (CITY_BBOX, istenirse başka bbox verilebilir)
+- hücreler np.arange ile tek seferde
+- hücre id'leri tam sayı (satır * n_cols + sütun), "cell_000123" yazısı
+  sadece istenince üretiliyor
+- aynı (bbox, cell_km) -> her zaman aynı hücreler, aynı id'ler
+  (farklı profillerin sonuçları hücre hücre birleştirilebilir)
+- kara / yerleşim maskesi (core.land_mask) verilirse deniz/orman hücreleri
+  hiç oluşturulmuyor; id'ler yine tam kafesteki (satır * n_cols + sütun)
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.land_mask import LandMask, load_land_mask
+
+# İstanbul: tüm POI csv'lerinin min/max'ı + ~0.02° pay
+# (min_lat, min_lon, max_lat, max_lon)
+CITY_BBOX = (40.79, 27.97, 41.44, 29.93)
+
+# 1 derece enlem ~ 111km
+KM_PER_DEG_LAT = 111.0
+
+# get_grid(kind=...): kare (bu dosya) ya da altıgen (core.hexgrid)
+GRID_KINDS = ("square", "hex")
+
+
+def format_cell_ids(cell_ids) -> list[str]:
+    return [f"cell_{int(i):06d}" for i in np.asarray(cell_ids).ravel()]
+
+
+class Grid:
+    """
+    bbox'u cell_km x cell_km hücrelere bölüyor.
+    Hücre merkezleri: latitude / longitude (numpy), id'ler: cell_id (int64).
+    Sıralama satır satır (güneyden kuzeye), satır içinde batıdan doğuya.
+    mask (LandMask) verilirse sadece tutulan hücreler: keep[row, col] == True.
+    """
+
+    kind = "square"
+
+    def __init__(self, bbox=CITY_BBOX, cell_km: float = 1.0, mask: LandMask | None = None):
+        min_lat, min_lon, max_lat, max_lon = (float(x) for x in bbox)
+        if max_lat <= min_lat or max_lon <= min_lon:
+            raise ValueError(f"Geçersiz bbox: {bbox}")
+        if cell_km <= 0:
+            raise ValueError(f"cell_km pozitif olmalı: {cell_km}")
+
+        self.bbox = (min_lat, min_lon, max_lat, max_lon)
+        self.cell_km = float(cell_km)
+
+        # boylam dönüşümü enleme göre değişiyor (cos(lat) var)
+        mid_lat = (min_lat + max_lat) / 2
+        self.lat_step = self.cell_km / KM_PER_DEG_LAT
+        self.lon_step = self.cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(mid_lat)))
+
+        # hücre köşeleri bbox içinde kalacak kadar satır/sütun
+        self.n_rows = int(math.floor((max_lat - min_lat) / self.lat_step + 1e-9)) + 1
+        self.n_cols = int(math.floor((max_lon - min_lon) / self.lon_step + 1e-9)) + 1
+
+        self.row_lat = min_lat + (np.arange(self.n_rows) + 0.5) * self.lat_step
+        self.col_lon = min_lon + (np.arange(self.n_cols) + 0.5) * self.lon_step
+
+        self.mask = mask
+        self._keep: np.ndarray | None = None
+
+        # hücre dizileri (G tane) ilk kullanımda kuruluyor;
+        # parça parça skorlamada (block) hiç kurulmayabilir
+        self._cells: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._target_ids: list[str] | None = None
+
+    @property
+    def keep(self) -> np.ndarray | None:
+        """
+        (n_rows, n_cols) bool, tutulan hücreler; maske yoksa None (her hücre var).
+        """
+        if self.mask is not None and self._keep is None:
+            self._keep = self.mask.cells_to_keep(self)
+        return self._keep
+
+    def __len__(self) -> int:
+        if self.keep is not None:
+            return int(self.keep.sum())
+        return self.n_rows * self.n_cols
+
+    def _all_cells(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._cells is None:
+            self._cells = self.block(0, self.n_rows, 0, self.n_cols)
+        return self._cells
+
+    @property
+    def cell_id(self) -> np.ndarray:
+        return self._all_cells()[0]
+
+    @property
+    def latitude(self) -> np.ndarray:
+        return self._all_cells()[1]
+
+    @property
+    def longitude(self) -> np.ndarray:
+        return self._all_cells()[2]
+
+    def block(self, row0: int, row1: int, col0: int, col1: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Satır [row0, row1) x sütun [col0, col1) dikdörtgeni: (cell_id, latitude, longitude).
+        Sıra tüm grid'deki ile aynı (satır satır), id'ler de global.
+        Maskeli hücreler dönmüyor.
+        """
+        rows = np.arange(row0, row1, dtype=np.int64)
+        cols = np.arange(col0, col1, dtype=np.int64)
+        ids = (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+        lat2d, lon2d = np.meshgrid(self.row_lat[row0:row1], self.col_lon[col0:col1], indexing="ij")
+        if self.mask is None:
+            return ids, lat2d.ravel(), lon2d.ravel()
+        if self._keep is not None:
+            keep = self._keep[row0:row1, col0:col1].ravel()
+        else:
+            # tüm kafesin maskesini kurmadan sadece bu blok (parça parça skorlama)
+            keep = self.mask.cells_to_keep(self, slice(row0, row1), slice(col0, col1)).ravel()
+        return ids[keep], lat2d.ravel()[keep], lon2d.ravel()[keep]
+
+    def __repr__(self) -> str:
+        return (
+            f"Grid(cell_km={self.cell_km}, rows={self.n_rows}, cols={self.n_cols}, "
+            f"cells={len(self)}, bbox={self.bbox})"
+        )
+
+    @property
+    def mask_tag(self) -> str:
+        return self.mask.version if self.mask is not None else ""
+
+    @property
+    def key(self) -> tuple:
+        # cache anahtarlarında grid'i temsil eden şey
+        if self.mask is None:
+            return (self.bbox, self.cell_km)
+        return (self.bbox, self.cell_km, self.mask_tag)
+
+    @property
+    def target_ids(self) -> list[str]:
+        # "cell_000123" yazıları sadece gerekince (csv/harita) üretiliyor
+        if self._target_ids is None:
+            self._target_ids = format_cell_ids(self.cell_id)
+        return self._target_ids
+
+    def row_col(self, cell_id) -> tuple[np.ndarray, np.ndarray]:
+        cell_id = np.asarray(cell_id, dtype=np.int64)
+        return cell_id // self.n_cols, cell_id % self.n_cols
+
+    def cell_of(self, lat, lon) -> np.ndarray:
+        """
+        Noktanın düştüğü hücrenin id'si; bbox dışındaysa ya da hücre maskeliyse -1.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        row = np.floor((lat - self.bbox[0]) / self.lat_step).astype(np.int64)
+        col = np.floor((lon - self.bbox[1]) / self.lon_step).astype(np.int64)
+        ok = (row >= 0) & (row < self.n_rows) & (col >= 0) & (col < self.n_cols)
+        if self.keep is not None:
+            ok &= self.keep[np.where(ok, row, 0), np.where(ok, col, 0)]
+        return np.where(ok, row * self.n_cols + col, -1)
+
+    def to_frame(self) -> pd.DataFrame:
+        grid = pd.DataFrame({"latitude": self.latitude, "longitude": self.longitude})
+        grid["target_id"] = self.target_ids
+        grid["name"] = grid["target_id"]
+        return grid
+
+
+_GRID_CACHE: dict[tuple, object] = {}
+
+
+def get_grid(cell_km: float = 1.0, bbox=CITY_BBOX, masked: bool = True, kind: str = "square"):
+    """
+    Aynı (bbox, cell_km) için aynı Grid nesnesi (process içinde bir kere kuruluyor).
+    masked=True: datasets/land_mask.npz varsa deniz/orman hücreleri atılıyor.
+    kind="hex": core.hexgrid.HexGrid (cell_km = altıgen kenarı), arayüz aynı.
+    """
+    if kind not in GRID_KINDS:
+        raise ValueError(f"Bilinmeyen grid tipi: {kind} | seçenekler: {GRID_KINDS}")
+
+    mask = load_land_mask() if masked else None
+    key = (kind, tuple(float(x) for x in bbox), float(cell_km), mask.version if mask is not None else "")
+    grid = _GRID_CACHE.get(key)
+    if grid is None:
+        if kind == "hex":
+            from core.hexgrid import HexGrid  # core.hexgrid bu dosyayı import ediyor
+
+            grid = HexGrid(bbox, cell_km, mask=mask)
+        else:
+            grid = Grid(bbox, cell_km, mask=mask)
+        _GRID_CACHE[key] = grid
+    return grid
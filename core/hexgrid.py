@@ -0,0 +1,276 @@
+# core/hexgrid.py
+"""
+Altıgen (hex) grid: kare grid'in (core.grid.Grid) yanında ikinci seçenek.
+
+Kare hücrelerde köşegen komşu kenar komşudan ~1.41 kat uzak; yöne bağlı bir
+bozulma var, komşuluk da (4 mü 8 mi?) yumuşatma/kümeleme için garip.
+Altıgende 6 komşunun hepsi aynı mesafede.
+
+- Koordinatlar "axial" (q, r), sivri tepeli (pointy-top) altıgenler.
+- Kenar uzunluğu = cell_km (komşu merkezler arası sqrt(3) * cell_km).
+- Düzlem: core.geodesy.LocalProjection (bbox ortası), metre.
+- Hücre id'si: (r - r_min) * n_q + (q - q_min); aynı (bbox, cell_km) -> aynı id'ler.
+- Grid ile aynı arayüz (cell_id / latitude / longitude / key / cell_of / to_frame),
+  skorlama, csv/geojson ve harita tarafı değişmeden çalışıyor.
+
+Ek olarak:
+- hex_of / cell_of: noktaların altıgenleri (vektörel, cube rounding)
+- ring / disk: k. halka komşuları; ofsetler önceden hazır, her komşu O(1)
+  (yoğun (r, q) -> pozisyon tablosundan okunuyor)
+- bucket + ring_count_within: POI'leri altıgenlere say, yarıçap sorgusunu
+  halkaları toplayarak cevapla (yaklaşık, altıgen çözünürlüğünde)
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.geodesy import LocalProjection
+from core.grid import CITY_BBOX, format_cell_ids
+from core.land_mask import LandMask
+
+SQRT3 = math.sqrt(3.0)
+
+# axial yönler (saat yönünün tersine, doğudan başlayarak)
+AXIAL_DIRECTIONS = np.array([(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)], dtype=np.int64)
+
+_RING_CACHE: dict[int, np.ndarray] = {}
+
+
+def ring_offsets(k: int) -> np.ndarray:
+    """
+    Merkezden tam k halka uzaktaki altıgenlerin (dq, dr) ofsetleri: (6k, 2); k=0 -> [(0, 0)].
+    """
+    k = int(k)
+    if k in _RING_CACHE:
+        return _RING_CACHE[k]
+    if k == 0:
+        out = np.zeros((1, 2), dtype=np.int64)
+    else:
+        cells = []
+        cur = AXIAL_DIRECTIONS[4] * k
+        for d in range(6):
+            for _ in range(k):
+                cells.append(cur.copy())
+                cur = cur + AXIAL_DIRECTIONS[d]
+        out = np.array(cells, dtype=np.int64)
+    _RING_CACHE[k] = out
+    return out
+
+
+def disk_offsets(k: int) -> np.ndarray:
+    """
+    0..k halkaların hepsi: 1 + 3k(k+1) ofset.
+    """
+    return np.concatenate([ring_offsets(i) for i in range(int(k) + 1)])
+
+
+def axial_round(qf, rf) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kesirli axial koordinatı en yakın altıgene yuvarla (cube rounding).
+    """
+    qf = np.asarray(qf, dtype=float)
+    rf = np.asarray(rf, dtype=float)
+    sf = -qf - rf
+    q, r, s = np.round(qf), np.round(rf), np.round(sf)
+    dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    q = np.where(fix_q, -r - s, q)
+    r = np.where(fix_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+
+class HexGrid:
+    """
+    bbox'u kenarı cell_km olan altıgenlere böler (merkezi bbox içinde kalanlar).
+    mask (LandMask) verilirse merkezi ya da köşelerinden biri yerleşimde olanlar tutuluyor.
+    """
+
+    kind = "hex"
+
+    def __init__(self, bbox=CITY_BBOX, cell_km: float = 0.5, mask: LandMask | None = None):
+        min_lat, min_lon, max_lat, max_lon = (float(x) for x in bbox)
+        if max_lat <= min_lat or max_lon <= min_lon:
+            raise ValueError(f"Geçersiz bbox: {bbox}")
+        if cell_km <= 0:
+            raise ValueError(f"cell_km pozitif olmalı: {cell_km}")
+
+        self.bbox = (min_lat, min_lon, max_lat, max_lon)
+        self.cell_km = float(cell_km)
+        self.size_m = self.cell_km * 1000.0
+        self.projection = LocalProjection((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+        self.mask = mask
+
+        (x0, y0), (x1, y1) = self.projection.project([min_lat, max_lat], [min_lon, max_lon])
+        s = self.size_m
+        self.r_min = int(math.ceil(y0 / (1.5 * s)))
+        r_max = int(math.floor(y1 / (1.5 * s)))
+        # q aralığı satıra göre kayıyor (x = s * sqrt3 * (q + r/2))
+        self.q_min = int(math.ceil(x0 / (s * SQRT3) - r_max / 2))
+        q_max = int(math.floor(x1 / (s * SQRT3) - self.r_min / 2))
+        self.n_r = r_max - self.r_min + 1
+        self.n_q = q_max - self.q_min + 1
+
+        r2d, q2d = np.meshgrid(
+            np.arange(self.r_min, r_max + 1, dtype=np.int64),
+            np.arange(self.q_min, q_max + 1, dtype=np.int64),
+            indexing="ij",
+        )
+        q, r = q2d.ravel(), r2d.ravel()
+        x, y = self.center_xy(q, r)
+        ok = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        q, r = q[ok], r[ok]
+
+        lat, lon = self.projection.unproject(np.column_stack(self.center_xy(q, r)))
+        if mask is not None:
+            keep = mask.contains(lat, lon)
+            for vx, vy in self._vertex_offsets():
+                cx, cy = self.center_xy(q, r)
+                vlat, vlon = self.projection.unproject(np.column_stack([cx + vx, cy + vy]))
+                keep |= mask.contains(vlat, vlon)
+            q, r, lat, lon = q[keep], r[keep], lat[keep], lon[keep]
+
+        self.q = q
+        self.r = r
+        self.cell_id = (r - self.r_min) * self.n_q + (q - self.q_min)
+        self.latitude = lat
+        self.longitude = lon
+
+        # (r, q) -> hücre pozisyonu (yoksa -1): komşu aramaları O(1)
+        self._pos = np.full((self.n_r, self.n_q), -1, dtype=np.int64)
+        self._pos[r - self.r_min, q - self.q_min] = np.arange(len(q), dtype=np.int64)
+
+        self._target_ids: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self.cell_id)
+
+    def __repr__(self) -> str:
+        return f"HexGrid(cell_km={self.cell_km}, cells={len(self)}, bbox={self.bbox})"
+
+    @property
+    def mask_tag(self) -> str:
+        return self.mask.version if self.mask is not None else ""
+
+    @property
+    def key(self) -> tuple:
+        return ("hex", self.bbox, self.cell_km, self.mask_tag)
+
+    @property
+    def target_ids(self) -> list[str]:
+        if self._target_ids is None:
+            self._target_ids = format_cell_ids(self.cell_id)
+        return self._target_ids
+
+    @property
+    def spacing_m(self) -> float:
+        # komşu altıgen merkezleri arası mesafe
+        return self.size_m * SQRT3
+
+    # ---------- geometri ----------
+
+    def center_xy(self, q, r) -> tuple[np.ndarray, np.ndarray]:
+        q = np.asarray(q, dtype=float)
+        r = np.asarray(r, dtype=float)
+        return self.size_m * SQRT3 * (q + r / 2), self.size_m * 1.5 * r
+
+    def _vertex_offsets(self) -> list[tuple[float, float]]:
+        s = self.size_m
+        return [(s * math.cos(math.radians(a)), s * math.sin(math.radians(a))) for a in range(30, 360, 60)]
+
+    def polygon(self, cell_id) -> list[tuple[float, float]]:
+        """
+        Altıgenin köşeleri [(lat, lon), ...] (harita çizimi için).
+        """
+        q, r = self.axial(np.array([cell_id]))
+        cx, cy = self.center_xy(q, r)
+        xy = np.array([(cx[0] + vx, cy[0] + vy) for vx, vy in self._vertex_offsets()])
+        lat, lon = self.projection.unproject(xy)
+        return list(zip(lat.tolist(), lon.tolist()))
+
+    def axial(self, cell_id) -> tuple[np.ndarray, np.ndarray]:
+        cell_id = np.asarray(cell_id, dtype=np.int64)
+        return cell_id % self.n_q + self.q_min, cell_id // self.n_q + self.r_min
+
+    def hex_of(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Noktaların axial (q, r) altıgenleri (grid dışında da olabilir).
+        """
+        xy = self.projection.project(lat, lon)
+        x, y = xy[..., 0], xy[..., 1]
+        s = self.size_m
+        return axial_round((SQRT3 / 3 * x - y / 3) / s, (2.0 / 3.0 * y) / s)
+
+    def _positions(self, q, r) -> np.ndarray:
+        q = np.asarray(q, dtype=np.int64)
+        r = np.asarray(r, dtype=np.int64)
+        iq, ir = q - self.q_min, r - self.r_min
+        ok = (iq >= 0) & (iq < self.n_q) & (ir >= 0) & (ir < self.n_r)
+        return np.where(ok, self._pos[np.where(ok, ir, 0), np.where(ok, iq, 0)], -1)
+
+    def cell_of(self, lat, lon) -> np.ndarray:
+        """
+        Noktanın düştüğü altıgenin id'si; grid dışı / maskeli ise -1.
+        """
+        q, r = self.hex_of(lat, lon)
+        pos = self._positions(q, r)
+        return np.where(pos >= 0, self.cell_id[np.maximum(pos, 0)], -1)
+
+    # ---------- komşuluk ----------
+
+    def ring(self, k: int, cells=None) -> np.ndarray:
+        """
+        Her hücrenin (cells: pozisyonlar, varsayılan hepsi) tam k. halkadaki komşularının
+        pozisyonları: (n, 6k); grid dışı / maskeli -> -1.
+        """
+        return self._neighbours(ring_offsets(k), cells)
+
+    def disk(self, k: int, cells=None) -> np.ndarray:
+        """
+        0..k halkaların hepsi (hücrenin kendisi dahil): (n, 1 + 3k(k+1)).
+        """
+        return self._neighbours(disk_offsets(k), cells)
+
+    def _neighbours(self, offsets: np.ndarray, cells=None) -> np.ndarray:
+        cells = np.arange(len(self)) if cells is None else np.asarray(cells, dtype=np.int64)
+        q = self.q[cells][:, None] + offsets[None, :, 0]
+        r = self.r[cells][:, None] + offsets[None, :, 1]
+        return self._positions(q, r)
+
+    # ---------- sayım ----------
+
+    def bucket(self, lat, lon) -> np.ndarray:
+        """
+        Altıgen başına nokta sayısı (len(self)); dışarıda kalanlar sayılmıyor.
+        """
+        q, r = self.hex_of(lat, lon)
+        pos = self._positions(q, r)
+        return np.bincount(pos[pos >= 0], minlength=len(self)).astype(np.int64)
+
+    def rings_for_radius(self, radius_m: float) -> int:
+        return int(round(float(radius_m) / self.spacing_m))
+
+    def ring_count_within(self, lat, lon, radius_m: float) -> np.ndarray:
+        """
+        "radius_m içinde kaç nokta?" sorusunun halka toplamlı hali:
+        noktalar altıgenlere sayılıyor, her hücre için ~radius_m'lik disk toplanıyor.
+        Yaklaşık (sınır altıgen çözünürlüğünde); kesin sayım için indeks kullan.
+        """
+        counts = self.bucket(lat, lon)
+        total = np.zeros(len(self), dtype=np.int64)
+        cells = np.arange(len(self))
+        for off in disk_offsets(self.rings_for_radius(radius_m)):
+            pos = self._positions(self.q + off[0], self.r + off[1])
+            ok = pos >= 0
+            total[cells[ok]] += counts[pos[ok]]
+        return total
+
+    def to_frame(self) -> pd.DataFrame:
+        grid = pd.DataFrame({"latitude": self.latitude, "longitude": self.longitude})
+        grid["target_id"] = self.target_ids
+        grid["name"] = grid["target_id"]
+        return grid
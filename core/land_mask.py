@@ -0,0 +1,130 @@
+# core/land_mask.py
+"""
+Kara / yerleşim maskesi: grid'in deniz (Marmara, Karadeniz), Boğaz'ın geniş
+kısımları ve kuzey ormanları üzerindeki hücrelerini baştan atmak için.
+
+Şehir bbox'u dikdörtgen; hücrelerin büyük kısmı suyun ya da ormanın üstünde
+kalıyordu. Oralar hem boşuna skorlanıyor hem de anlamsız sonuç veriyordu.
+
+Maske offline üretiliyor (scripts/build_land_mask.py) ve repoda duruyor
+(datasets/land_mask.npz):
+- MASK_CELL_KM'lik bir raster (CITY_BBOX üzerinde)
+- raster hücresi "yerleşim" = merkezine MASK_RADIUS_M içinde en az
+  MASK_MIN_POIS POI var (clean_csv'deki tüm kategoriler: cami, okul, market...)
+
+Grid kurulurken (core.grid.Grid(mask=...)) bir hücre, kapladığı alandaki
+raster hücrelerinden biri yerleşimse tutuluyor. Raster dışı kalan yerler
+(başka bir bbox) bilinmiyor sayılıp tutuluyor.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+MASK_PATH = BASE_DIR / "datasets" / "land_mask.npz"
+
+MASK_CELL_KM = 0.25
+MASK_RADIUS_M = 500
+MASK_MIN_POIS = 2
+
+
+class LandMask:
+    """
+    flags: (n_rows, n_cols) bool raster, satır/sütunlar core.grid.Grid(bbox, cell_km) ile aynı.
+    """
+
+    def __init__(self, bbox, cell_km: float, flags: np.ndarray):
+        from core.grid import Grid  # core.grid de bunu import ediyor
+
+        self.raster = Grid(bbox, cell_km)
+        self.flags = np.asarray(flags, dtype=bool).reshape(self.raster.n_rows, self.raster.n_cols)
+        # cache anahtarları için kısa etiket: raster değişince değişiyor
+        payload = repr((self.raster.bbox, self.raster.cell_km)).encode("utf-8") + np.packbits(self.flags).tobytes()
+        self.version = hashlib.sha1(payload).hexdigest()[:12]
+
+    def __repr__(self) -> str:
+        return f"LandMask(cell_km={self.raster.cell_km}, kept={self.flags.mean():.1%}, version={self.version})"
+
+    def contains(self, lat, lon) -> np.ndarray:
+        """
+        Nokta yerleşim raster hücresinde mi? Raster dışı -> True (bilinmiyor, atma).
+        """
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        g = self.raster
+        row = np.floor((lat - g.bbox[0]) / g.lat_step).astype(np.int64)
+        col = np.floor((lon - g.bbox[1]) / g.lon_step).astype(np.int64)
+        inside = (row >= 0) & (row < g.n_rows) & (col >= 0) & (col < g.n_cols)
+        out = np.ones(lat.shape, dtype=bool)
+        out[inside] = self.flags[row[inside], col[inside]]
+        return out
+
+    def cells_to_keep(self, grid, rows: slice = slice(None), cols: slice = slice(None)) -> np.ndarray:
+        """
+        grid'in tutulacak hücreleri, (satır x sütun) bool; rows/cols ile sadece bir blok.
+        Hücre raster'dan büyükse içinden k x k örnek nokta bakılıyor (biri yeterli),
+        böylece 1-2 km'lik hücreler kenardaki yerleşimi kaybetmiyor.
+        """
+        k = max(1, int(math.ceil(grid.cell_km / self.raster.cell_km)))
+        offsets = (np.arange(k) + 0.5) / k - 0.5
+        row_lat = grid.row_lat[rows]
+        col_lon = grid.col_lon[cols]
+
+        keep = np.zeros((len(row_lat), len(col_lon)), dtype=bool)
+        for dy in offsets:
+            lat = row_lat + dy * grid.lat_step
+            for dx in offsets:
+                lon = col_lon + dx * grid.lon_step
+                keep |= self.contains(lat[:, None], lon[None, :])
+        return keep
+
+    def save(self, path: Path = MASK_PATH) -> Path:
+        path = Path(path)
+        np.savez_compressed(
+            path,
+            bbox=np.asarray(self.raster.bbox, dtype=float),
+            cell_km=np.float64(self.raster.cell_km),
+            shape=np.asarray(self.flags.shape, dtype=np.int64),
+            flags=np.packbits(self.flags.ravel()),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Path = MASK_PATH) -> "LandMask":
+        with np.load(path) as z:
+            shape = tuple(int(x) for x in z["shape"])
+            flags = np.unpackbits(z["flags"])[: shape[0] * shape[1]].astype(bool)
+            return cls(tuple(float(x) for x in z["bbox"]), float(z["cell_km"]), flags)
+
+
+def build_land_mask(lat, lon, bbox, cell_km: float = MASK_CELL_KM, radius_m=MASK_RADIUS_M, min_pois=MASK_MIN_POIS):
+    """
+    POI yoğunluğundan maske: raster hücresi merkezinin radius_m içinde en az min_pois nokta.
+    """
+    from core.grid import Grid
+    from core.spatial_index import build_index
+
+    raster = Grid(bbox, cell_km)
+    counts = build_index(lat, lon).count_within(raster.latitude, raster.longitude, radius_m)
+    return LandMask(bbox, cell_km, counts >= min_pois)
+
+
+_MASK_CACHE: dict[str, tuple[int, LandMask]] = {}
+
+
+def load_land_mask(path: Path = MASK_PATH) -> LandMask | None:
+    """
+    Process içinde bir kere yükle; dosya yoksa None (maske yok, tüm grid).
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    stamp = path.stat().st_mtime_ns
+    cached = _MASK_CACHE.get(str(path))
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, LandMask.load(path))
+        _MASK_CACHE[str(path)] = cached
+    return cached[1]
@@ -0,0 +1,195 @@
+# core/map_tiles.py
+"""
+Skor yüzeyinden statik "slippy map" tile piramidi: <dizin>/{z}/{x}/{y}.png.
+
+Preset profillerin skorları veri güncellenene kadar değişmiyor; her ziyaretçi
+için run_profile + raster üretmek yerine tile'lar bir kere (offline) yazılıyor,
+harita bunları folium TileLayer ile çekiyor (sunucuda sadece statik dosya).
+
+- tile'lar Web Mercator (OSM ile aynı z/x/y şeması), 256 piksel
+- her piksel: merkezinin düştüğü grid hücresinin rengi (core.score_raster.cell_colors)
+- tamamen şeffaf tile'lar yazılmıyor (deniz/orman, bbox dışı) -> Leaflet boş geçiyor
+- dizine meta.json: içerik anahtarı (profil + veri + maske), cell_km, zoom aralığı,
+  sınırlar, renk ölçeği; anahtar tutmazsa piramit eski sayılıyor
+
+Streamlit "static/" klasörünü app/static/... altında servis ediyor
+(.streamlit/config.toml: enableStaticServing), tile'lar o yüzden orada.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from core.result_cache import result_key
+from core.score_raster import cell_colors, encode_png, image_bounds, score_range
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+TILES_DIR = BASE_DIR / "static" / "tiles"
+
+# TILES_DIR'in tarayıcıdan göründüğü yol (streamlit statik servis, sayfaya göre)
+TILES_URL = "app/static/tiles"
+
+TILE_SIZE = 256
+
+# piramidin üretildiği grid (app'teki cell_km seçiminden bağımsız)
+TILE_CELL_KM = 0.5
+
+# üretilen zoom aralığı (dahil)
+TILE_MIN_ZOOM = 9
+TILE_MAX_ZOOM = 15
+
+META_NAME = "meta.json"
+
+
+def tile_xy(lat, lon, z: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (lat, lon) -> z seviyesindeki tile (x, y) (OSM şeması, y kuzeyden).
+    """
+    n = 2 ** int(z)
+    lat = np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511)
+    lon = np.asarray(lon, dtype=float)
+    x = np.floor((lon + 180.0) / 360.0 * n).astype(np.int64)
+    phi = np.radians(lat)
+    y = np.floor((1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / math.pi) / 2.0 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def tile_range(bounds, z: int) -> tuple[int, int, int, int]:
+    """
+    [[güney, batı], [kuzey, doğu]] alanını kapsayan tile'lar: (x0, x1, y0, y1), dahil.
+    """
+    (south, west), (north, east) = bounds
+    x0, y0 = tile_xy(north, west, z)
+    x1, y1 = tile_xy(south, east, z)
+    return int(x0), int(x1), int(y0), int(y1)
+
+
+def pixel_centers(z: int, x: int, y: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Tile'ın piksel merkezleri: (satır başına enlem (256,), sütun başına boylam (256,)).
+    """
+    world = TILE_SIZE * 2 ** int(z)
+    p = np.arange(TILE_SIZE) + 0.5
+    lon = (x * TILE_SIZE + p) / world * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1.0 - 2.0 * (y * TILE_SIZE + p) / world))))
+    return lat, lon
+
+
+def render_tile(grid, colors: np.ndarray, z: int, x: int, y: int) -> np.ndarray | None:
+    """
+    (256, 256, 4) RGBA; colors: cell_colors çıktısı (n_rows, n_cols, 4).
+    Tile tamamen şeffafsa None.
+    """
+    lat, lon = pixel_centers(z, x, y)
+    min_lat, min_lon = grid.bbox[0], grid.bbox[1]
+    rows = np.floor((lat - min_lat) / grid.lat_step).astype(np.int64)
+    cols = np.floor((lon - min_lon) / grid.lon_step).astype(np.int64)
+    row_ok = (rows >= 0) & (rows < grid.n_rows)
+    col_ok = (cols >= 0) & (cols < grid.n_cols)
+    if not row_ok.any() or not col_ok.any():
+        return None
+
+    # önce kapsanan hücre bloğunda görünür hücre var mı (çoğu tile deniz/orman)
+    r, c = rows[row_ok], cols[col_ok]
+    if not colors[r.min() : r.max() + 1, c.min() : c.max() + 1, 3].any():
+        return None
+
+    # RGBA'yı tek uint32 olarak topla (4 kat az eleman)
+    packed = np.ascontiguousarray(colors).view(np.uint32)[..., 0]
+    tile = packed[np.where(row_ok, rows, 0)[:, None], np.where(col_ok, cols, 0)[None, :]]
+    tile[~row_ok] = 0
+    tile[:, ~col_ok] = 0
+    if not tile.any():
+        return None
+    return tile.view(np.uint8).reshape(TILE_SIZE, TILE_SIZE, 4)
+
+
+def build_tiles(
+    grid,
+    cell_id,
+    scores,
+    out_dir: Path,
+    min_zoom: int = TILE_MIN_ZOOM,
+    max_zoom: int = TILE_MAX_ZOOM,
+    meta: dict | None = None,
+) -> dict:
+    """
+    Piramidi out_dir'e yazar (önce geçici dizine, bitince eskisinin yerine).
+    meta: meta.json'a eklenecek alanlar (profil, veri versiyonu...).
+    Dönüş: yazılan meta (tile sayısı dahil).
+    """
+    out_dir = Path(out_dir)
+    vmin, vmax = score_range(scores)
+    colors = cell_colors(grid, cell_id, scores, vmin=vmin, vmax=vmax)
+    bounds = image_bounds(grid)
+
+    tmp = out_dir.with_name(f".{out_dir.name}.tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+
+    n_tiles = 0
+    for z in range(int(min_zoom), int(max_zoom) + 1):
+        x0, x1, y0, y1 = tile_range(bounds, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                tile = render_tile(grid, colors, z, x, y)
+                if tile is None:
+                    continue
+                path = tmp / str(z) / str(x) / f"{y}.png"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(encode_png(tile))
+                n_tiles += 1
+
+    info = dict(meta or {})
+    info.update(
+        {
+            "cell_km": grid.cell_km,
+            "min_zoom": int(min_zoom),
+            "max_zoom": int(max_zoom),
+            "bounds": bounds,
+            "vmin": vmin,
+            "vmax": vmax,
+            "tiles": n_tiles,
+        }
+    )
+    tmp.mkdir(parents=True, exist_ok=True)
+    (tmp / META_NAME).write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    os.replace(tmp, out_dir)
+    return info
+
+
+def tile_dir(profile_id: str) -> Path:
+    return TILES_DIR / profile_id
+
+
+def tile_url(profile_id: str) -> str:
+    return f"{TILES_URL}/{profile_id}/{{z}}/{{x}}/{{y}}.png"
+
+
+def tiles_key(profile: dict, data_version: str, mask_tag: str = "", cell_km: float = TILE_CELL_KM) -> str:
+    # sonuç cache'iyle aynı normalizasyon: isim/açıklama değişince piramit eskimiyor
+    return result_key(profile, cell_km, 0, data_version, kind="tiles", mask=mask_tag)
+
+
+def load_tile_meta(profile_id: str, key: str | None = None) -> dict | None:
+    """
+    Preset'in piramidi varsa meta.json (+ "url"); yoksa ya da key verilip
+    eşleşmiyorsa (veri/profil değişmiş, tile'lar eski) None.
+    """
+    path = tile_dir(profile_id) / META_NAME
+    try:
+        meta = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if key is not None and meta.get("key") != key:
+        return None
+    meta["url"] = tile_url(profile_id)
+    return meta
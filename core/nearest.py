@@ -0,0 +1,75 @@
+# core/nearest.py
+"""
+En yakın POI mesafeleri: kategori başına 1. ve 3. en yakın POI (metre).
+
+Yarıçap içi sayım "en yakın hastane 200 m mi 990 m mi?" sorusuna cevap
+vermiyor; 1010 m'deki istasyon da 1000 m yarıçapta hiç sayılmıyor.
+Burada grid hücreleri için toplu k-NN sorgusu (core.spatial_index nearest)
+yapılıyor; sonuç yarıçaptan bağımsız, (kategori, grid) başına bir kere.
+
+Profilde opsiyonel:
+    "nearest": {"hospital_main": 3, ...}
+-> skora weight * proximity_scores(1. en yakın mesafe) ekleniyor,
+   çıktıya <kategori>_nearest1_m / _nearest3_m kolonları geliyor.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+
+# hangi komşular (1 = en yakın)
+NEAREST_RANKS = (1, 3)
+
+# RAM'de tutulan (kategori x grid) mesafe tablosu sayısı
+NEAREST_CACHE_MAX = 32
+
+
+def nearest_column(cat: str, rank: int) -> str:
+    return f"{cat}_nearest{int(rank)}_m"
+
+
+def nearest_term(cat: str) -> str:
+    # kırılımdaki (contrib_) adı: sayım katkısıyla karışmasın
+    return f"{cat}_nearest"
+
+
+def nearest_distances(index, lat, lon, ranks=NEAREST_RANKS) -> np.ndarray:
+    """
+    (hücre x len(ranks)) mesafe, metre; yeterli POI yoksa inf.
+    """
+    ranks = [int(r) for r in ranks]
+    dist = index.nearest(lat, lon, max(ranks))
+    return dist[:, [r - 1 for r in ranks]]
+
+
+def proximity_scores(dist_m, radius_m: float) -> np.ndarray:
+    """
+    Mesafe -> 0..5 puan (saturating_score ile aynı ölçek):
+    dibinde 5, radius_m'de ~1.8, 3 * radius_m'de ~0.25; inf -> 0.
+    """
+    d = np.asarray(dist_m, dtype=float)
+    return 5.0 * np.exp(-d / max(float(radius_m), 1.0))
+
+
+_NEAREST_CACHE: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+
+def get_nearest(key: tuple, build_fn) -> np.ndarray:
+    """
+    Küçük LRU (core.distance_cube.get_cube gibi); build_fn sadece cache'te yoksa.
+    """
+    dist = _NEAREST_CACHE.get(key)
+    if dist is not None:
+        _NEAREST_CACHE.move_to_end(key)
+        return dist
+
+    dist = build_fn()
+    _NEAREST_CACHE[key] = dist
+    while len(_NEAREST_CACHE) > NEAREST_CACHE_MAX:
+        _NEAREST_CACHE.popitem(last=False)
+    return dist
+
+
+def clear_nearest_cache() -> None:
+    _NEAREST_CACHE.clear()
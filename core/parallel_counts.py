@@ -0,0 +1,195 @@
+# core/parallel_counts.py
+"""
+Sayım işini (kategori x grid dilimi) parçalara bölüp process havuzunda koşturur.
+
+score_grid kategorileri tek tek, tek çekirdekte sayıyordu. Burada:
+- POI'ler bir POIStore dizininde duruyor (memory-map): worker'a sadece
+  dizin yolu + kategori adı gidiyor, koordinatlar pickle'lanmıyor.
+- grid de gönderilmiyor: (bbox, cell_km) ile worker kendisi kuruyor (get_grid).
+- iş birimi = (kategori, hücre aralığı). Her birim kendi sonucunu döndürüyor,
+  ana process sonucu sabit yerine yazıyor -> çıktı iş sırası ne olursa olsun
+  seri yolla birebir aynı (her hücrenin sayımı diğerlerinden bağımsız).
+
+Maliyet: havuz "spawn" ile açılıyor; ilk çağrıda her worker Python'u baştan
+başlatıp modülleri (sklearn dahil) import ediyor ve grid'i (maske dahil) kuruyor -> birkaç saniye.
+Tüm kategoriler tek birleşik indeksle seri yolda zaten ~0.05 sn (1 km grid), yani
+workers > 1 sadece büyük işlerde (ince cell_km, çok kategori, uzun yaşayan
+process) kazandırıyor. Havuz process boyunca yaşıyor (get_pool); ilk isteği
+beklemek istemeyen warm_pool ile önceden ısıtabilir.
+"""
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from core.grid import get_grid
+from core.poi_store import POIStore, open_store
+from core.spatial_index import DEFAULT_BACKEND, build_index
+
+# worker başına birim sayısı hedefi (yük dengesi için biraz fazla parça)
+UNITS_PER_WORKER = 4
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+# ---------- worker tarafı ----------
+
+# worker içinde açılan depo + kurulan indeksler (aynı depo için tekrar kurulmasın)
+_WORKER_STORE: POIStore | None = None
+_WORKER_INDEXES: dict = {}
+
+
+def _worker_index(store_dir: str, cat: str, backend: str):
+    global _WORKER_STORE
+    # open_store: depo yeniden derlenmişse (manifest değişmiş) yenisini açıyor
+    store = open_store(Path(store_dir))
+    if store is None:
+        raise FileNotFoundError(f"POI deposu yok: {store_dir}")
+    if store is not _WORKER_STORE:
+        _WORKER_STORE = store
+        _WORKER_INDEXES.clear()
+
+    key = (_WORKER_STORE.stamp, cat, backend)
+    if key not in _WORKER_INDEXES:
+        lat, lon = _WORKER_STORE.points(cat)
+        _WORKER_INDEXES[key] = build_index(lat, lon, backend=backend)
+    return _WORKER_INDEXES[key]
+
+
+def _warm_unit(bbox, cell_km: float | None, grid_kind: str, backend: str) -> int:
+    # import'lar (sklearn indeks içinde lazy) + (verilirse) grid bu worker'da hazır olsun
+    build_index(np.zeros(1), np.zeros(1), backend=backend)
+    if cell_km is not None:
+        get_grid(cell_km, bbox=tuple(bbox), kind=grid_kind)
+    time.sleep(0.05)  # işler tek worker'a yığılmasın
+    return os.getpid()
+
+
+def _count_unit(
+    store_dir: str,
+    cat: str,
+    bbox,
+    cell_km: float,
+    start: int,
+    stop: int,
+    radius_m: int,
+    backend: str,
+    grid_kind: str = "square",
+):
+    """
+    Tek iş birimi: bir kategori için grid hücreleri [start, stop) sayımı.
+    """
+    grid = get_grid(cell_km, bbox=tuple(bbox), kind=grid_kind)
+    index = _worker_index(store_dir, cat, backend)
+    counts = index.count_within(grid.latitude[start:stop], grid.longitude[start:stop], radius_m)
+    return counts.astype(np.int32)
+
+
+# ---------- ana process tarafı ----------
+
+_POOLS: dict[int, ProcessPoolExecutor] = {}
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Havuz her worker sayısı için bir kere açılıyor, istekler arasında yaşıyor.
+    "spawn": streamlit gibi thread'li bir process'i fork'lamıyoruz.
+    """
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        _POOLS[workers] = pool
+    return pool
+
+
+def warm_pool(
+    workers: int | None = None,
+    cell_km: float | None = None,
+    bbox=None,
+    grid_kind: str = "square",
+    index_backend: str = DEFAULT_BACKEND,
+) -> int:
+    """
+    Havuzu açıp worker'ları başlatır (spawn + indeks import'ları), cell_km verilirse
+    grid'i de her worker'da kurar. Uygulama açılışında / toplu işten önce çağrılır.
+    Dönüş: ısınan worker sayısı.
+    """
+    workers = default_workers() if workers is None else max(1, int(workers))
+    if cell_km is not None and bbox is None:
+        bbox = get_grid(cell_km, kind=grid_kind).bbox
+    pool = get_pool(workers)
+    futs = [pool.submit(_warm_unit, bbox, cell_km, grid_kind, index_backend) for _ in range(2 * workers)]
+    return len({f.result() for f in futs})
+
+
+def shutdown_pools() -> None:
+    for pool in _POOLS.values():
+        pool.shutdown(wait=True)
+    _POOLS.clear()
+
+
+def tile_ranges(n_cells: int, n_tiles: int) -> list[tuple[int, int]]:
+    """
+    [0, n_cells) aralığını n_tiles parçaya böler (satır sırası, ardışık hücreler).
+    """
+    n_tiles = max(1, min(int(n_tiles), n_cells))
+    step = math.ceil(n_cells / n_tiles) if n_cells else 1
+    return [(a, min(a + step, n_cells)) for a in range(0, n_cells, step)]
+
+
+def count_matrix_parallel(
+    store_dir: Path,
+    categories: list[str],
+    cell_km: float,
+    radius_m: int,
+    bbox=None,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = None,
+    n_tiles: int | None = None,
+    grid_kind: str = "square",
+) -> np.ndarray:
+    """
+    (G x C) int32 sayım matrisi; kolon sırası categories ile aynı.
+    store_dir: kategorileri içeren POIStore dizini.
+    n_tiles verilmezse kategori başına ~ UNITS_PER_WORKER * workers / C dilim.
+    """
+    workers = default_workers() if workers is None else max(1, int(workers))
+    grid = get_grid(cell_km, kind=grid_kind) if bbox is None else get_grid(cell_km, bbox=bbox, kind=grid_kind)
+
+    if n_tiles is None:
+        n_tiles = math.ceil(UNITS_PER_WORKER * workers / max(1, len(categories)))
+    ranges = tile_ranges(len(grid), n_tiles)
+
+    counts = np.zeros((len(grid), len(categories)), dtype=np.int32)
+    if len(grid) == 0 or not categories:
+        return counts
+
+    pool = get_pool(workers)
+    jobs = []
+    for j, cat in enumerate(categories):
+        for start, stop in ranges:
+            fut = pool.submit(
+                _count_unit,
+                str(store_dir),
+                cat,
+                grid.bbox,
+                grid.cell_km,
+                start,
+                stop,
+                int(radius_m),
+                index_backend,
+                grid_kind,
+            )
+            jobs.append((j, start, stop, fut))
+
+    for j, start, stop, fut in jobs:
+        counts[start:stop, j] = fut.result()
+    return counts
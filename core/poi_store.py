@@ -0,0 +1,239 @@
+# core/poi_store.py
+"""
+Tüm POI kategorileri için tek, kolon bazlı binary depo.
+
+Her run_profile'da 13 csv'yi pd.read_csv ile okuyup NaN atıp float'a
+çevirmek yerine, bunu bir kere "derleyip" .npy dosyalarına yazıyoruz:
+
+    poi_store/
+      manifest.json            -> kategoriler, offset'ler, kaynak veri versiyonu, dosya adları
+      latitude.<build>.npy     -> tüm POI'ler (kategoriye göre sıralı)
+      longitude.<build>.npy
+      category_code.<build>.npy -> her POI'nin kategori kodu (int16)
+      offsets.<build>.npy      -> kategori j: offsets[j] : offsets[j + 1]
+      attr_<kolon>.<build>.npy -> opsiyonel kolonlar (market_type, health_type...) kod olarak
+
+Dizi dosyalarının adında derleme id'si var, manifest hangilerini kullandığını
+yazıyor: yeniden derleme eski dosyaların üstüne yazmıyor, manifest tek
+os.replace ile değişiyor. Eski manifest'i okumuş biri eski dosyaları açar,
+yenisini okumuş biri yenilerini (bir önceki nesil silinmeden tutuluyor).
+
+Okurken np.load(mmap_mode="r") kullanıyoruz: dosya RAM'e kopyalanmıyor,
+aynı makinedeki worker process'ler aynı sayfaları paylaşıyor.
+"""
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+STORE_DIR = BASE_DIR / "datasets" / "poi_store"
+
+# csv'de varsa depoya alınan ek kolonlar (yoksa -1 / boş)
+ATTRIBUTE_COLUMNS = ["name", "market_type", "health_type"]
+
+STORE_FORMAT = 1
+
+
+def build_store(
+    frames: dict[str, pd.DataFrame],
+    out_dir: Path = STORE_DIR,
+    data_version: str = "",
+    coord_dtype=np.float64,
+) -> Path:
+    """
+    frames: {kategori: latitude/longitude kolonlu temiz DataFrame}
+    Kategoriler verildiği sırada arka arkaya yazılıyor.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    categories = list(frames.keys())
+    sizes = [len(frames[cat]) for cat in categories]
+    offsets = np.zeros(len(categories) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+
+    if categories:
+        lat = np.concatenate([frames[c]["latitude"].to_numpy(dtype=coord_dtype) for c in categories])
+        lon = np.concatenate([frames[c]["longitude"].to_numpy(dtype=coord_dtype) for c in categories])
+    else:
+        lat = np.empty(0, dtype=coord_dtype)
+        lon = np.empty(0, dtype=coord_dtype)
+    codes = np.repeat(np.arange(len(categories), dtype=np.int16), sizes)
+
+    arrays = {"latitude": lat, "longitude": lon, "category_code": codes, "offsets": offsets}
+
+    attributes = {}
+    for col in ATTRIBUTE_COLUMNS:
+        if not any(col in frames[c].columns for c in categories):
+            continue
+        values = pd.concat(
+            [
+                frames[c][col] if col in frames[c].columns else pd.Series([None] * len(frames[c]), dtype=object)
+                for c in categories
+            ],
+            ignore_index=True,
+        )
+        # string kolonları sözlük kodlaması ile saklıyoruz (-1 = boş)
+        codes_attr, labels = pd.factorize(values, use_na_sentinel=True)
+        arrays[f"attr_{col}"] = codes_attr.astype(np.int32)
+        attributes[col] = [str(x) for x in labels]
+
+    # diziler bu derlemeye özel adlarla (eskilerin üstüne yazılmıyor), manifest en son:
+    # okuyan ya tamamen eski ya tamamen yeni depoyu görüyor
+    build_id = uuid.uuid4().hex[:12]
+    files = {}
+    for name, arr in arrays.items():
+        files[name] = f"{name}.{build_id}.npy"
+        tmp = out_dir / f".{files[name]}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, out_dir / files[name])
+
+    previous = _manifest_files(out_dir)
+    manifest = {
+        "format": STORE_FORMAT,
+        "data_version": data_version,
+        "categories": categories,
+        "offsets": offsets.tolist(),
+        "coord_dtype": np.dtype(coord_dtype).name,
+        "attributes": attributes,
+        "files": files,
+        # bir önceki nesil: o manifest'i okumuş okuyucular için silinmiyor
+        "previous_files": sorted(previous),
+    }
+    tmp = out_dir / "manifest.tmp.json"
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, out_dir / "manifest.json")
+
+    # iki nesilden eski dizi dosyalarını temizle
+    keep = set(files.values()) | previous
+    for p in out_dir.glob("*.npy"):
+        if p.name not in keep:
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+    return out_dir
+
+
+def _manifest_files(store_dir: Path) -> set[str]:
+    # mevcut manifest'in kullandığı dizi dosyaları (eski formatta: <ad>.npy)
+    try:
+        manifest = json.loads((store_dir / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return set()
+    files = manifest.get("files")
+    if files is None:
+        names = ["latitude", "longitude", "category_code", "offsets"]
+        names += [f"attr_{col}" for col in manifest.get("attributes", {})]
+        return {f"{name}.npy" for name in names}
+    return set(files.values())
+
+
+class POIStore:
+    """
+    Derlenmiş depoyu memory-map ile açar.
+    Kategori dilimleri (latitude[a:b] gibi) kopya değil, aynı mmap'in görünümü.
+    """
+
+    def __init__(self, store_dir: Path = STORE_DIR):
+        self.store_dir = Path(store_dir)
+        manifest_path = self.store_dir / "manifest.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"POI deposu yok: {manifest_path} (scripts/build_poi_store.py çalıştır)")
+
+        # depo yeniden derlenince değişiyor (open_store bununla tazeliyor)
+        self.stamp = manifest_path.stat().st_mtime_ns
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if self.manifest.get("format") != STORE_FORMAT:
+            raise ValueError(f"POI deposu formatı eski: {self.manifest.get('format')} != {STORE_FORMAT}")
+
+        self.categories: list[str] = list(self.manifest["categories"])
+        self.data_version: str = self.manifest.get("data_version", "")
+        self._code = {c: j for j, c in enumerate(self.categories)}
+
+        self.latitude = self._load("latitude")
+        self.longitude = self._load("longitude")
+        self.category_code = self._load("category_code")
+        self.offsets = np.asarray(self._load("offsets"))
+        self._attr_labels: dict[str, list[str]] = self.manifest.get("attributes", {})
+
+    def _load(self, name: str) -> np.ndarray:
+        # dosya adı manifest'ten (derleme id'li); eski depolarda <ad>.npy
+        fname = self.manifest.get("files", {}).get(name, f"{name}.npy")
+        return np.load(self.store_dir / fname, mmap_mode="r")
+
+    def __contains__(self, cat: str) -> bool:
+        return cat in self._code
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    def code(self, cat: str) -> int:
+        return self._code[cat]
+
+    def _slice(self, cat: str) -> slice:
+        j = self._code[cat]
+        return slice(int(self.offsets[j]), int(self.offsets[j + 1]))
+
+    def points(self, cat: str) -> tuple[np.ndarray, np.ndarray]:
+        sl = self._slice(cat)
+        return self.latitude[sl], self.longitude[sl]
+
+    @property
+    def attributes(self) -> list[str]:
+        return list(self._attr_labels.keys())
+
+    def attribute(self, col: str, cat: str | None = None) -> np.ndarray:
+        """
+        Opsiyonel kolonun yazı hali (boşlar None). cat verilirse sadece o kategori.
+        """
+        codes = self._load(f"attr_{col}")
+        if cat is not None:
+            codes = codes[self._slice(cat)]
+        labels = np.array(self._attr_labels[col] + [None], dtype=object)
+        return labels[np.asarray(codes)]
+
+    def frame(self, cat: str, attributes: bool = False) -> pd.DataFrame:
+        """
+        Kategori için load_poi_csv çıktısına benzeyen DataFrame (latitude/longitude + istenirse ek kolonlar).
+        """
+        lat, lon = self.points(cat)
+        df = pd.DataFrame({"latitude": np.asarray(lat, dtype=float), "longitude": np.asarray(lon, dtype=float)})
+        if attributes:
+            for col in self.attributes:
+                df[col] = self.attribute(col, cat)
+        return df
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.latitude.nbytes + self.longitude.nbytes + self.category_code.nbytes + self.offsets.nbytes)
+
+
+_STORE_CACHE: dict[str, POIStore] = {}
+
+
+def open_store(store_dir: Path = STORE_DIR) -> POIStore | None:
+    """
+    Process içinde depoyu bir kere aç; yoksa None (çağıran csv'ye düşer).
+    manifest değişmişse (yeniden derlenmiş) tekrar açıyoruz.
+    """
+    store_dir = Path(store_dir)
+    manifest_path = store_dir / "manifest.json"
+    if not manifest_path.exists():
+        return None
+
+    store = _STORE_CACHE.get(str(store_dir))
+    if store is None or store.stamp != manifest_path.stat().st_mtime_ns:
+        try:
+            store = POIStore(store_dir)
+        except (OSError, ValueError, KeyError):
+            return None
+        _STORE_CACHE[str(store_dir)] = store
+    return store
@@ -0,0 +1,118 @@
+# core/quadtree.py
+"""
+İnce grid üzerinde kaba -> ince (quadtree) hücre blokları.
+
+Seviye L'deki bir düğüm, ince grid'in 2^L x 2^L'lik satır/sütun bloğu:
+    satır [R * 2^L, (R + 1) * 2^L), sütun [C * 2^L, (C + 1) * 2^L)
+(grid kenarında kırpılıyor). Seviye 0 = tek ince hücre.
+Aynı bbox üzerinde cell_km * 2^L'lik grid'in hücreleriyle birebir örtüşüyor
+(Grid'in adımları cell_km ile orantılı, başlangıç köşesi aynı).
+
+Skor üst/alt sınırı için her düğümün "merkezi" ve merkezden içindeki
+en uzak ince hücre merkezine mesafe (half_diag_m) lazım:
+    count(q, r) <= count(merkez, r + h)   ve   count(q, r) >= count(merkez, r - h)
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from core.geodesy import haversine_m
+
+
+def top_level(cell_km: float, coarse_km: float) -> int:
+    """
+    coarse_km'ye en yakın 2^L * cell_km seviyesi (en az 0).
+    """
+    if coarse_km <= cell_km:
+        return 0
+    return max(0, int(round(math.log2(float(coarse_km) / float(cell_km)))))
+
+
+def level_nodes(grid, level: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Seviyedeki tüm düğümler (R, C), satır satır.
+    """
+    s = 1 << level
+    n_r = -(-grid.n_rows // s)
+    n_c = -(-grid.n_cols // s)
+    R, C = np.meshgrid(np.arange(n_r, dtype=np.int64), np.arange(n_c, dtype=np.int64), indexing="ij")
+    return R.ravel(), C.ravel()
+
+
+def node_ranges(grid, level: int, R, C):
+    """
+    Düğümlerin ince grid aralıkları: (row0, row1, col0, col1), kırpılmış.
+    """
+    s = 1 << level
+    R = np.asarray(R, dtype=np.int64)
+    C = np.asarray(C, dtype=np.int64)
+    row0 = R * s
+    col0 = C * s
+    row1 = np.minimum(row0 + s, grid.n_rows)
+    col1 = np.minimum(col0 + s, grid.n_cols)
+    return row0, row1, col0, col1
+
+
+def node_geometry(grid, level: int, R, C):
+    """
+    Dönüş: (center_lat, center_lon, half_diag_m, n_cells)
+    half_diag_m: merkezden köşe ince hücre merkezlerine en büyük mesafe (+%1 pay).
+    n_cells: bloktaki maskesiz hücre sayısı (0 olan blok hiç skor üretmez).
+    """
+    row0, row1, col0, col1 = node_ranges(grid, level, R, C)
+    lat_a, lat_b = grid.row_lat[row0], grid.row_lat[row1 - 1]
+    lon_a, lon_b = grid.col_lon[col0], grid.col_lon[col1 - 1]
+    lat_c = (lat_a + lat_b) / 2
+    lon_c = (lon_a + lon_b) / 2
+
+    h = np.zeros(len(lat_c))
+    for la in (lat_a, lat_b):
+        for lo in (lon_a, lon_b):
+            h = np.maximum(h, haversine_m(lat_c, lon_c, la, lo))
+    h = h * 1.01 + 1.0
+
+    return lat_c, lon_c, h, node_cell_counts(grid, row0, row1, col0, col1)
+
+
+def node_cell_counts(grid, row0, row1, col0, col1) -> np.ndarray:
+    """
+    Bloklardaki (maskesiz) ince hücre sayısı; maske varsa 2B kümülatif toplamdan.
+    """
+    if grid.keep is None:
+        return (row1 - row0) * (col1 - col0)
+    sat = np.zeros((grid.n_rows + 1, grid.n_cols + 1), dtype=np.int64)
+    sat[1:, 1:] = grid.keep.cumsum(axis=0).cumsum(axis=1)
+    return sat[row1, col1] - sat[row0, col1] - sat[row1, col0] + sat[row0, col0]
+
+
+def split(grid, level: int, R, C) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Düğümleri 4 çocuğa böl (seviye level - 1); grid dışına düşenler atılıyor.
+    Çıktı satır satır sıralı (önce R, sonra C).
+    """
+    R = np.asarray(R, dtype=np.int64)
+    C = np.asarray(C, dtype=np.int64)
+    cr = (2 * R[:, None] + np.array([0, 0, 1, 1])).ravel()
+    cc = (2 * C[:, None] + np.array([0, 1, 0, 1])).ravel()
+
+    s = 1 << (level - 1)
+    keep = (cr * s < grid.n_rows) & (cc * s < grid.n_cols)
+    cr, cc = cr[keep], cc[keep]
+    order = np.lexsort((cc, cr))
+    return cr[order], cc[order]
+
+
+def nth_largest(values, weights, n: int) -> float:
+    """
+    Her değer "weights" kadar tekrarlanmış gibi n. en büyük değer; toplam < n ise -inf.
+    (Düğüm alt sınırları: düğümdeki her ince hücrenin skoru en az bu kadar.)
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=np.int64)
+    if n <= 0 or weights.sum() < n:
+        return -math.inf
+    order = np.argsort(-values, kind="stable")
+    k = int(np.searchsorted(np.cumsum(weights[order]), n))
+    return float(values[order][k])
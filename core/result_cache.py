@@ -0,0 +1,197 @@
+# core/result_cache.py
+"""
+İçerik adresli sonuç cache'i (skor tabloları, dışa aktarılan csv/geojson'lar,
+harita html'leri, skor rasterleri).
+
+Eskiden dosya adları sadece profile_id'ye bağlıydı: tüm "custom"
+kullanıcılar aynı grid_scores_custom.csv / map_custom.html dosyasına
+yazıyordu (eşzamanlı kullanıcıda biri diğerinin sonucunu görebiliyor)
+ve klasörler sınırsız büyüyordu.
+
+Burada:
+- anahtar = hash(normalize profil, cell_km, top_n, veri versiyonu, ...)
+- yazma atomik (geçici dosya + os.replace)
+- toplam boyut / dosya sayısı sınırı aşılınca en eski kullanılan silinir (LRU)
+- hit / miss / eviction sayaçları
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+CACHE_DIR = BASE_DIR / "outputs" / "cache" / "results"
+
+# profil içinde skoru etkilemeyen alanlar (anahtara girmiyor)
+_COSMETIC_KEYS = {"profile_id", "profile_name", "description"}
+
+
+def normalize_profile(profile: dict) -> dict:
+    """
+    Aynı skoru verecek profiller aynı hale gelsin:
+    isim/açıklama atılıyor, 0 ağırlıklar (must_have/avoid'da geçmiyorsa) atılıyor, listeler sıralanıyor.
+    """
+    # must_have / avoid'da geçen kategori 0 ağırlıkla da skoru etkiliyor
+    # (must_have kontrolü sadece weights'teki kategorilere bakıyor): onlar atılmıyor
+    referenced = set(profile.get("must_have", []) or []) | set(profile.get("avoid", []) or [])
+    out = {}
+    for k, v in profile.items():
+        if k in _COSMETIC_KEYS:
+            continue
+        if k == "weights":
+            v = {cat: float(w) for cat, w in sorted(v.items()) if float(w) != 0 or cat in referenced}
+        elif k in ("must_have", "avoid"):
+            v = sorted(set(v or []))
+        out[k] = v
+    out.setdefault("radius_m", 1000)
+    out["radius_m"] = int(out["radius_m"])
+    return out
+
+
+def result_key(profile: dict, cell_km: float, top_n: int, data_version: str, **extra) -> str:
+    payload = {
+        "profile": normalize_profile(profile),
+        "cell_km": float(cell_km),
+        "top_n": int(top_n or 0),
+        "data_version": data_version,
+        "extra": extra,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+class ResultCache:
+    """
+    Disk cache: her giriş cache_dir altında <key><suffix> dosyası.
+    LRU için dosyanın mtime'ını kullanıyoruz (hit olunca güncelleniyor).
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 2000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / f"{key}{suffix}"
+
+    # ---------- okuma ----------
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        try:
+            os.utime(path)  # LRU: son kullanım
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get_path(self, key: str, suffix: str) -> Path | None:
+        path = self.path(key, suffix)
+        ok = self._touch(path)
+        self._count(hit=ok)
+        return path if ok else None
+
+    def get_frame(self, key: str) -> pd.DataFrame | None:
+        path = self.path(key, ".pkl")
+        df = None
+        if self._touch(path):
+            try:
+                df = pd.read_pickle(path)
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError):
+                # yarım/bozuk dosya ya da başka pandas/numpy sürümünün pickle'ı:
+                # miss say, girişi sil, yeniden hesaplanıp yazılır
+                df = None
+                path.unlink(missing_ok=True)
+        self._count(hit=df is not None)
+        return df
+
+    # ---------- yazma ----------
+
+    def _atomic_write(self, path: Path, write_fn) -> Path:
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write_fn(tmp)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        self.evict()
+        return path
+
+    def put_frame(self, key: str, df: pd.DataFrame) -> Path:
+        return self._atomic_write(self.path(key, ".pkl"), lambda p: df.to_pickle(p))
+
+    def put_text(self, key: str, suffix: str, text: str) -> Path:
+        return self._atomic_write(self.path(key, suffix), lambda p: p.write_text(text, encoding="utf-8"))
+
+    def put_file(self, key: str, suffix: str, write_fn) -> Path:
+        # write_fn(path): csv/geojson gibi kendi yazıcısı olan çıktılar
+        return self._atomic_write(self.path(key, suffix), write_fn)
+
+    def put_bytes(self, key: str, suffix: str, data: bytes) -> Path:
+        # png gibi ikili çıktılar (skor rasteri)
+        return self._atomic_write(self.path(key, suffix), lambda p: p.write_bytes(data))
+
+    # ---------- bakım ----------
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for p in self.cache_dir.iterdir():
+            if p.name.startswith(".") or not p.is_file():
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Sınır aşıldıysa en eski kullanılanlardan başlayarak sil.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, p = entries.pop(0)
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        if removed:
+            with self._lock:
+                self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": int(sum(size for _, size, _ in entries)),
+        }
@@ -0,0 +1,168 @@
+# core/score_raster.py
+"""
+Skor yüzeyi rasteri: tüm grid'in score_total'ı tek bir renkli PNG.
+
+Harita en fazla birkaç yüz daireyi çizebiliyor; tüm şehri (on binlerce hücre)
+vektör olarak göstermek ağır. Burada:
+- kare grid'in her hücresi bir piksel (satır/sütun = lattice satır/sütun)
+- skor -> renk: 256'lık renk tablosu (LUT), tek indeksleme
+- maskeli / grid'de olmayan hücreler ve must_have'e takılan (-1e9) hücreler şeffaf
+- PNG encoder'ı stdlib (zlib + struct), PIL/matplotlib gerekmiyor
+- harita tarafı: folium ImageOverlay, sınırlar image_bounds(grid)
+
+Leaflet resmi Web Mercator'da doğrusal geriyor; enlem doğrusal değil.
+Satırlar Mercator'da eşit aralıklı örnekleniyor (en yakın grid satırı),
+böylece hücreler haritada doğru enleme oturuyor.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+
+import numpy as np
+
+# düşük -> yüksek skor (haritadaki mavi/kırmızı ile aynı uçlar)
+SCORE_RAMP = ("#2b83ba", "#abdda4", "#ffffbf", "#fdae61", "#d7191c")
+
+# bu skorun altı "elenmiş" sayılıyor (must_have -> -1e9)
+MASKED_SCORE = -1e8
+
+# renk ölçeği uçları: aykırı birkaç hücre tüm rengi yıkamasın diye yüzdelik
+SCORE_PERCENTILES = (2.0, 98.0)
+
+# grid satırı başına çıktı satırı (Mercator örneklemesinde satır atlanmasın)
+ROWS_PER_CELL = 2
+
+
+def _hex_rgb(color: str) -> tuple[int, int, int]:
+    color = color.lstrip("#")
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+
+def color_lut(ramp=SCORE_RAMP, n: int = 256) -> np.ndarray:
+    """
+    (n, 4) uint8 RGBA tablo: ramp renkleri arası doğrusal geçiş, alfa 255.
+    """
+    stops = np.array([_hex_rgb(c) for c in ramp], dtype=float)
+    pos = np.linspace(0.0, 1.0, len(stops))
+    t = np.linspace(0.0, 1.0, n)
+    lut = np.full((n, 4), 255, dtype=np.uint8)
+    for ch in range(3):
+        lut[:, ch] = np.rint(np.interp(t, pos, stops[:, ch])).astype(np.uint8)
+    return lut
+
+
+_LUT = color_lut()
+
+
+def _mercator_y(lat) -> np.ndarray:
+    phi = np.radians(np.asarray(lat, dtype=float))
+    return np.log(np.tan(np.pi / 4 + phi / 2))
+
+
+def image_bounds(grid) -> list[list[float]]:
+    """
+    Resmin kapladığı alan [[güney, batı], [kuzey, doğu]]: tüm kafes (hücre kenarları).
+    """
+    min_lat, min_lon = grid.bbox[0], grid.bbox[1]
+    return [
+        [min_lat, min_lon],
+        [min_lat + grid.n_rows * grid.lat_step, min_lon + grid.n_cols * grid.lon_step],
+    ]
+
+
+def cell_colors(grid, cell_id, scores, vmin: float | None = None, vmax: float | None = None) -> np.ndarray:
+    """
+    (n_rows, n_cols, 4) uint8 RGBA, kafes sırasında (satır 0 = güney).
+    cell_id / scores: skorlanan hücreler (kare grid lattice id'leri, sıra önemli değil).
+    vmin / vmax verilmezse geçerli skorların SCORE_PERCENTILES yüzdelikleri.
+    Skor rasteri ve tile piramidi (core.map_tiles) aynı renkleri buradan alıyor.
+    """
+    if getattr(grid, "kind", "square") != "square":
+        raise ValueError("Skor rasteri sadece kare grid için (hücre = piksel)")
+
+    cell_id = np.asarray(cell_id, dtype=np.int64)
+    scores = np.asarray(scores, dtype=float)
+
+    # lattice (satır, sütun) -> skor; olmayan hücre NaN
+    lattice = np.full(grid.n_rows * grid.n_cols, np.nan)
+    lattice[cell_id] = scores
+    lattice = lattice.reshape(grid.n_rows, grid.n_cols)
+    valid = np.isfinite(lattice) & (lattice > MASKED_SCORE)
+
+    if vmin is None or vmax is None:
+        lo, hi = score_range(scores)
+        vmin = lo if vmin is None else vmin
+        vmax = hi if vmax is None else vmax
+
+    span = float(vmax) - float(vmin)
+    if span > 0:
+        t = (np.where(valid, lattice, vmin) - vmin) / span
+    else:
+        t = np.ones_like(lattice)
+    idx = np.clip(np.rint(t * (len(_LUT) - 1)), 0, len(_LUT) - 1).astype(np.intp)
+
+    rgba = _LUT[idx]
+    rgba[~valid] = 0
+    return rgba
+
+
+def score_image(
+    grid,
+    cell_id,
+    scores,
+    vmin: float | None = None,
+    vmax: float | None = None,
+    rows_per_cell: int = ROWS_PER_CELL,
+) -> np.ndarray:
+    """
+    (H, W, 4) uint8 RGBA, üst satır kuzey; renkler cell_colors ile aynı.
+    """
+    colors = cell_colors(grid, cell_id, scores, vmin=vmin, vmax=vmax)
+
+    # çıktı satırları Mercator'da eşit aralıklı, her biri en yakın grid satırından
+    (south, _), (north, _) = image_bounds(grid)
+    h = max(1, int(grid.n_rows * max(1, int(rows_per_cell))))
+    y_s, y_n = _mercator_y(south), _mercator_y(north)
+    y = y_n - (np.arange(h) + 0.5) * (y_n - y_s) / h
+    lat = np.degrees(2.0 * np.arctan(np.exp(y)) - np.pi / 2)
+    rows = np.clip(((lat - south) // grid.lat_step).astype(np.int64), 0, grid.n_rows - 1)
+    return colors[rows]
+
+
+def encode_png(rgba: np.ndarray, level: int = 6) -> bytes:
+    """
+    (H, W, 4) uint8 -> PNG (RGBA, 8 bit, filtre yok).
+    """
+    rgba = np.ascontiguousarray(rgba, dtype=np.uint8)
+    h, w = rgba.shape[:2]
+    # her satırın başına filtre baytı (0 = yok)
+    raw = np.zeros((h, 1 + w * 4), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(h, w * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), level))
+        + chunk(b"IEND", b"")
+    )
+
+
+def score_png(grid, cell_id, scores, vmin: float | None = None, vmax: float | None = None) -> bytes:
+    return encode_png(score_image(grid, cell_id, scores, vmin=vmin, vmax=vmax))
+
+
+def score_range(scores) -> tuple[float, float]:
+    """
+    Lejant için: score_image'ın varsayılan renk ölçeği uçları.
+    """
+    s = np.asarray(scores, dtype=float)
+    s = s[np.isfinite(s) & (s > MASKED_SCORE)]
+    if not s.size:
+        return 0.0, 1.0
+    lo, hi = np.percentile(s, SCORE_PERCENTILES)
+    return float(lo), float(hi)
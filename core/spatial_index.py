@@ -0,0 +1,315 @@
+# core/spatial_index.py
+"""
+POI noktaları için mekânsal indeks katmanı.
+
+Eskiden her grid hücresi için tüm POI'leri tek tek gezip
+haversine hesaplıyorduk (iterrows + math). Burada her kategori için
+bir kere indeks kuruyoruz, sonra "radius_m içinde kaç POI var?"
+sorusunu tüm hücreler için tek seferde soruyoruz.
+
+Mesafe mantığı aynı kalıyor: indeks sadece aday çıkarıyor,
+son karar yine haversine (metre) <= radius_m ile veriliyor.
+İstenirse "fast" mod (kdtree): izdüşümlü metre koordinatlarında Öklid.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from core.geodesy import DEFAULT_PROJECTION, EARTH_RADIUS_M, haversine_m, squared_distance
+
+# BruteForce tarafında (hücre x POI) matrisini parça parça kuruyoruz ki RAM patlamasın
+_BRUTE_CHUNK_PAIRS = 4_000_000
+
+# k-NN sorgusu kaç hücrelik parçalarla (ağaç sorgusu (n x k) dizi döndürüyor)
+_KNN_CHUNK_CELLS = 200_000
+
+
+def _as_points(lat, lon) -> tuple[np.ndarray, np.ndarray]:
+    lat = np.asarray(lat, dtype=float).ravel()
+    lon = np.asarray(lon, dtype=float).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError(f"latitude/longitude boyutları uyuşmuyor: {lat.shape} != {lon.shape}")
+    return lat, lon
+
+
+class _BaseIndex:
+    """
+    Tüm indekslerin ortak arayüzü:
+    - query_pairs: (hücre, POI, mesafe) üçlüleri (sadece radius_m içindekiler)
+    - count_within: hücre başına POI sayısı (numpy dizi)
+    - nearest: hücre başına en yakın k POI'nin mesafeleri
+    mode: "exact" (haversine) ya da "fast" (izdüşüm, bkz. core.geodesy)
+    """
+
+    name = "base"
+    mode = "exact"
+
+    def __init__(self, lat, lon):
+        self.lat, self.lon = _as_points(lat, lon)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.lat.nbytes + self.lon.nbytes)
+
+    def _candidates(self, lat: np.ndarray, lon: np.ndarray, radius_m: float):
+        raise NotImplementedError
+
+    def query_pairs(self, lat, lon, radius_m: float):
+        """
+        Dönüş: (cell_idx, poi_idx, dist_m)
+        cell_idx artan sırada gelir, böylece çağıran taraf CSR gibi kullanabilir.
+        """
+        lat, lon = _as_points(lat, lon)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=float))
+        if len(self) == 0 or len(lat) == 0:
+            return empty
+
+        cell_idx, poi_idx = self._candidates(lat, lon, float(radius_m))
+        if len(cell_idx) == 0:
+            return empty
+
+        dist = self._pair_distances(lat, lon, cell_idx, poi_idx)
+        keep = dist <= radius_m
+        return cell_idx[keep], poi_idx[keep], dist[keep]
+
+    def _pair_distances(self, lat, lon, cell_idx, poi_idx) -> np.ndarray:
+        # kesin kontrol: eski scalar haversine ile aynı "<= radius_m" kuralı
+        return haversine_m(lat[cell_idx], lon[cell_idx], self.lat[poi_idx], self.lon[poi_idx])
+
+    def count_within(self, lat, lon, radius_m: float) -> np.ndarray:
+        lat, lon = _as_points(lat, lon)
+        cell_idx, _, _ = self.query_pairs(lat, lon, radius_m)
+        return np.bincount(cell_idx, minlength=len(lat)).astype(np.int64)
+
+    def _knn(self, lat: np.ndarray, lon: np.ndarray, k: int) -> np.ndarray:
+        # (n, k) POI indeksleri, yakından uzağa (k <= len(self))
+        raise NotImplementedError
+
+    def nearest(self, lat, lon, k: int) -> np.ndarray:
+        """
+        (n, k) mesafe (metre), her satır artan sırada.
+        POI sayısı k'dan azsa eksik kolonlar inf.
+        Mesafeler count_within ile aynı kuraldan (_pair_distances) geliyor.
+        """
+        lat, lon = _as_points(lat, lon)
+        k = int(k)
+        out = np.full((len(lat), k), np.inf)
+        kk = min(k, len(self))
+        if kk == 0 or len(lat) == 0:
+            return out
+
+        for start in range(0, len(lat), _KNN_CHUNK_CELLS):
+            sl = slice(start, start + _KNN_CHUNK_CELLS)
+            poi_idx = self._knn(lat[sl], lon[sl], kk)
+            cell_idx = np.repeat(np.arange(len(poi_idx), dtype=np.int64), kk)
+            dist = self._pair_distances(lat[sl], lon[sl], cell_idx, poi_idx.ravel()).reshape(-1, kk)
+            out[sl, :kk] = np.sort(dist, axis=1)
+        return out
+
+
+class BallTreeIndex(_BaseIndex):
+    """
+    sklearn BallTree (haversine metriği, birim küre üzerinde radyan).
+    Adayları biraz geniş yarıçapla alıyoruz, kesin eleme query_pairs'te.
+    """
+
+    name = "balltree"
+
+    def __init__(self, lat, lon, leaf_size: int = 40):
+        super().__init__(lat, lon)
+        from sklearn.neighbors import BallTree
+
+        self._tree = None
+        if len(self) > 0:
+            pts = np.radians(np.column_stack([self.lat, self.lon]))
+            self._tree = BallTree(pts, metric="haversine", leaf_size=leaf_size)
+
+    @property
+    def nbytes(self) -> int:
+        n = super().nbytes
+        if self._tree is not None:
+            n += sum(int(a.nbytes) for a in self._tree.get_arrays())
+        return n
+
+    def _candidates(self, lat, lon, radius_m):
+        query = np.radians(np.column_stack([lat, lon]))
+        # küçük pay: sınırdaki noktayı ağaç yuvarlaması yüzünden kaçırmayalım
+        r = radius_m / EARTH_RADIUS_M * (1 + 1e-9) + 1e-12
+        ind = self._tree.query_radius(query, r=r)
+
+        lengths = np.fromiter((len(x) for x in ind), dtype=np.int64, count=len(ind))
+        cell_idx = np.repeat(np.arange(len(ind), dtype=np.int64), lengths)
+        poi_idx = np.concatenate(ind).astype(np.int64) if lengths.sum() else np.empty(0, dtype=np.int64)
+        return cell_idx, poi_idx
+
+    def _knn(self, lat, lon, k):
+        _, ind = self._tree.query(np.radians(np.column_stack([lat, lon])), k=k)
+        return ind.astype(np.int64)
+
+
+class BruteForceIndex(_BaseIndex):
+    """
+    İndekssiz referans: (hücre x POI) mesafe matrisini parça parça hesaplar.
+    sklearn yoksa ya da sonuçları karşılaştırmak istersek işe yarıyor.
+    """
+
+    name = "brute"
+
+    def _candidates(self, lat, lon, radius_m):
+        n_poi = len(self)
+        step = max(1, _BRUTE_CHUNK_PAIRS // n_poi)
+
+        cells, pois = [], []
+        for start in range(0, len(lat), step):
+            sl = slice(start, start + step)
+            d = haversine_m(lat[sl, None], lon[sl, None], self.lat[None, :], self.lon[None, :])
+            ci, pi = np.nonzero(d <= radius_m)
+            cells.append(ci.astype(np.int64) + start)
+            pois.append(pi.astype(np.int64))
+        return np.concatenate(cells), np.concatenate(pois)
+
+    def _knn(self, lat, lon, k):
+        step = max(1, _BRUTE_CHUNK_PAIRS // len(self))
+        out = []
+        for start in range(0, len(lat), step):
+            sl = slice(start, start + step)
+            d = haversine_m(lat[sl, None], lon[sl, None], self.lat[None, :], self.lon[None, :])
+            out.append(np.argpartition(d, k - 1, axis=1)[:, :k].astype(np.int64))
+        return np.concatenate(out)
+
+
+class ProjectedKDTreeIndex(_BaseIndex):
+    """
+    "fast" mod: POI'ler bir kere metreye izdüşürülüyor (core.geodesy.LocalProjection),
+    sklearn KDTree (Öklid) üzerinde aranıyor; eleme dx² + dy² <= r² ile.
+    Haversine'e göre hata sınırı core.geodesy'de yazıyor (~%0.5).
+    """
+
+    name = "kdtree"
+    mode = "fast"
+
+    def __init__(self, lat, lon, projection=DEFAULT_PROJECTION, leaf_size: int = 40):
+        super().__init__(lat, lon)
+        from sklearn.neighbors import KDTree
+
+        self.projection = projection
+        self.xy = projection.project(self.lat, self.lon)
+        self._tree = KDTree(self.xy, leaf_size=leaf_size) if len(self) > 0 else None
+
+    @property
+    def nbytes(self) -> int:
+        n = super().nbytes + int(self.xy.nbytes)
+        if self._tree is not None:
+            n += sum(int(a.nbytes) for a in self._tree.get_arrays())
+        return n
+
+    def _candidates(self, lat, lon, radius_m):
+        ind = self._tree.query_radius(self.projection.project(lat, lon), r=radius_m * (1 + 1e-9))
+
+        lengths = np.fromiter((len(x) for x in ind), dtype=np.int64, count=len(ind))
+        cell_idx = np.repeat(np.arange(len(ind), dtype=np.int64), lengths)
+        poi_idx = np.concatenate(ind).astype(np.int64) if lengths.sum() else np.empty(0, dtype=np.int64)
+        return cell_idx, poi_idx
+
+    def _knn(self, lat, lon, k):
+        _, ind = self._tree.query(self.projection.project(lat, lon), k=k)
+        return ind.astype(np.int64)
+
+    def _pair_distances(self, lat, lon, cell_idx, poi_idx) -> np.ndarray:
+        # eleme dx² + dy² <= r² ile aynı; karekök sadece dönen mesafe için
+        q = self.projection.project(lat[cell_idx], lon[cell_idx])
+        return np.sqrt(squared_distance(q, self.xy[poi_idx]))
+
+
+INDEX_BACKENDS = {
+    BallTreeIndex.name: BallTreeIndex,
+    BruteForceIndex.name: BruteForceIndex,
+    ProjectedKDTreeIndex.name: ProjectedKDTreeIndex,
+}
+
+DEFAULT_BACKEND = BallTreeIndex.name
+
+# mesafe modu -> indeks tipi (core.geodesy.DISTANCE_MODES)
+MODE_BACKENDS = {
+    "exact": BallTreeIndex.name,
+    "fast": ProjectedKDTreeIndex.name,
+}
+
+
+def backend_mode(backend: str) -> str:
+    """
+    İndeks tipinin mesafe modu ("exact" / "fast"); cache anahtarları için.
+    """
+    backend = MODE_BACKENDS.get(backend, backend)
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Bilinmeyen indeks tipi: {backend} | seçenekler: {list(INDEX_BACKENDS)}")
+    return INDEX_BACKENDS[backend].mode
+
+
+class UnionIndex:
+    """
+    Birden çok kategorinin birleşimi üzerinde tek indeks.
+    Her POI'nin kategorisi codes'ta (categories sırasıyla 0..C-1); komşu sorgusu
+    bir kere yapılıp sayımlar np.bincount ile kategorilere ayrılıyor.
+    Böylece C kategori saymak ~ bir kategori saymak kadar sürüyor.
+    """
+
+    def __init__(self, points: dict, backend: str = DEFAULT_BACKEND):
+        """
+        points: {kategori: (lat, lon)}
+        """
+        self.categories = [str(c) for c in points]
+        lats, lons = [], []
+        for cat in points:
+            lat, lon = _as_points(*points[cat])
+            lats.append(lat)
+            lons.append(lon)
+
+        sizes = np.array([len(x) for x in lats], dtype=np.int64)
+        self.codes = np.repeat(np.arange(len(self.categories), dtype=np.int16), sizes)
+        lat = np.concatenate(lats) if lats else np.empty(0)
+        lon = np.concatenate(lons) if lons else np.empty(0)
+        self.index = build_index(lat, lon, backend=backend)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def n_categories(self) -> int:
+        return len(self.categories)
+
+    @property
+    def mode(self) -> str:
+        return self.index.mode
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.index.nbytes + self.codes.nbytes)
+
+    def query_pairs(self, lat, lon, radius_m: float):
+        return self.index.query_pairs(lat, lon, radius_m)
+
+    def count_within(self, lat, lon, radius_m: float) -> np.ndarray:
+        """
+        (hücre x kategori) sayım matrisi, kolonlar categories sırasında.
+        """
+        lat, lon = _as_points(lat, lon)
+        cell_idx, poi_idx, _ = self.index.query_pairs(lat, lon, radius_m)
+        n_cat = self.n_categories
+        flat = np.bincount(cell_idx * n_cat + self.codes[poi_idx], minlength=len(lat) * n_cat)
+        return flat.reshape(len(lat), n_cat).astype(np.int64)
+
+
+def build_index(lat, lon, backend: str = DEFAULT_BACKEND) -> _BaseIndex:
+    """
+    Bir POI kategorisi için indeks kurar.
+    backend: "balltree" (varsayılan), "brute", "kdtree"
+    ya da mod adı: "exact" (= balltree) / "fast" (= kdtree).
+    """
+    backend = MODE_BACKENDS.get(backend, backend)
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Bilinmeyen indeks tipi: {backend} | seçenekler: {list(INDEX_BACKENDS)}")
+    return INDEX_BACKENDS[backend](lat, lon)
@@ -0,0 +1,134 @@
+# core/tiling.py
+"""
+Parça parça (tile) skorlama için yardımcılar.
+
+cell_km=0.1 gibi ince çözünürlükte ya da büyük bir bölgede grid milyonlarca
+hücre oluyor; tüm (hücre x kategori) matrisini RAM'de tutmak yerine bbox'u
+dikdörtgen parçalara bölüyoruz:
+- tile_blocks: grid'i tile_km x tile_km'lik satır/sütun bloklarına ayırır
+- PointWindow: bir kategorinin POI'lerinden sadece "parça + yarıçap" içindekiler
+- TileChunkWriter / iter_tile_chunks: her parçanın tüm skorları diske (.npy)
+
+Bellek tüketimi parça boyutuna bağlı, grid boyutuna değil.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from core.geodesy import EARTH_RADIUS_M
+
+# varsayılan parça kenarı (km)
+TILE_KM = 10.0
+
+_M_PER_DEG_LAT = EARTH_RADIUS_M * math.pi / 180.0
+
+
+def tile_blocks(grid, tile_km: float = TILE_KM) -> list[tuple[int, int, int, int]]:
+    """
+    (row0, row1, col0, col1) blokları, satır satır (güneyden kuzeye, batıdan doğuya).
+    """
+    step = max(1, int(round(float(tile_km) / grid.cell_km)))
+    return [
+        (r0, min(r0 + step, grid.n_rows), c0, min(c0 + step, grid.n_cols))
+        for r0 in range(0, grid.n_rows, step)
+        for c0 in range(0, grid.n_cols, step)
+    ]
+
+
+def radius_margin_deg(radius_m: float, max_abs_lat: float) -> tuple[float, float]:
+    """
+    radius_m'yi derece payına çevir (enlem, boylam).
+    Boylam payı en kuzeydeki enleme göre (cos küçüldükçe pay büyüyor) + %1 güvenlik.
+    """
+    dlat = radius_m / _M_PER_DEG_LAT * 1.01
+    cos_lat = math.cos(math.radians(min(89.0, abs(max_abs_lat) + dlat)))
+    dlon = radius_m / (_M_PER_DEG_LAT * cos_lat) * 1.01
+    return dlat, dlon
+
+
+class PointWindow:
+    """
+    Bir kategorinin noktaları enleme göre sıralı tutuluyor;
+    select(bbox) önce searchsorted ile enlem bandı, sonra boylam maskesi.
+    """
+
+    def __init__(self, lat, lon):
+        lat = np.asarray(lat, dtype=float).ravel()
+        lon = np.asarray(lon, dtype=float).ravel()
+        order = np.argsort(lat, kind="stable")
+        self.lat = lat[order]
+        self.lon = lon[order]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def select(self, min_lat, min_lon, max_lat, max_lon) -> tuple[np.ndarray, np.ndarray]:
+        a = np.searchsorted(self.lat, min_lat, side="left")
+        b = np.searchsorted(self.lat, max_lat, side="right")
+        lat = self.lat[a:b]
+        lon = self.lon[a:b]
+        keep = (lon >= min_lon) & (lon <= max_lon)
+        return lat[keep], lon[keep]
+
+
+def block_bbox(grid, block, radius_m: float) -> tuple[float, float, float, float]:
+    """
+    Bloktaki hücre merkezlerinin kapsadığı alan + radius_m payı.
+    """
+    row0, row1, col0, col1 = block
+    min_lat, max_lat = float(grid.row_lat[row0]), float(grid.row_lat[row1 - 1])
+    min_lon, max_lon = float(grid.col_lon[col0]), float(grid.col_lon[col1 - 1])
+    dlat, dlon = radius_margin_deg(radius_m, max(abs(min_lat), abs(max_lat)))
+    return min_lat - dlat, min_lon - dlon, max_lat + dlat, max_lon + dlon
+
+
+class TileChunkWriter:
+    """
+    Parça skorlarını out_dir altına yazar:
+        cells_00000.npy  (int64 hücre id)
+        scores_00000.npy (float64 score_total)
+        manifest.json    (close'ta: parça sayısı, toplam hücre, grid bilgisi)
+    """
+
+    def __init__(self, out_dir: Path, meta: dict | None = None):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        # önceki koşunun parçaları karışmasın
+        for p in self.out_dir.glob("*.npy"):
+            p.unlink()
+        self.meta = dict(meta or {})
+        self.n_chunks = 0
+        self.n_cells = 0
+
+    def write(self, cell_id: np.ndarray, score_total: np.ndarray) -> None:
+        k = self.n_chunks
+        np.save(self.out_dir / f"cells_{k:05d}.npy", np.asarray(cell_id, dtype=np.int64))
+        np.save(self.out_dir / f"scores_{k:05d}.npy", np.asarray(score_total, dtype=np.float64))
+        self.n_chunks += 1
+        self.n_cells += len(cell_id)
+
+    def close(self) -> Path:
+        manifest = dict(self.meta, n_chunks=self.n_chunks, n_cells=self.n_cells)
+        tmp = self.out_dir / "manifest.tmp.json"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.out_dir / "manifest.json")
+        return self.out_dir
+
+
+def iter_tile_chunks(out_dir: Path, mmap: bool = True):
+    """
+    TileChunkWriter çıktısını parça parça okur: (cell_id, score_total) çiftleri.
+    """
+    out_dir = Path(out_dir)
+    manifest = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    mode = "r" if mmap else None
+    for k in range(int(manifest["n_chunks"])):
+        yield (
+            np.load(out_dir / f"cells_{k:05d}.npy", mmap_mode=mode),
+            np.load(out_dir / f"scores_{k:05d}.npy", mmap_mode=mode),
+        )
@@ -0,0 +1,43 @@
+# scripts/build_land_mask.py
+"""
+Kara / yerleşim maskesini (datasets/land_mask.npz) clean_csv'deki tüm POI'lerden üretir.
+Ayrıntı: core/land_mask.py. Veri güncellenince tekrar çalıştırmak yeterli;
+maske değişince grid ve sayım cache anahtarları da kendiliğinden değişiyor.
+
+    python scripts/build_land_mask.py
+"""
+from pathlib import Path
+import sys
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "datasets" / "clean_csv"
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.grid import CITY_BBOX
+from core.land_mask import MASK_PATH, build_land_mask
+from scripts.scoring_grid import load_poi_csv
+
+
+def main():
+    lats, lons = [], []
+    for path in sorted(DATA_DIR.glob("*.csv")):
+        df = load_poi_csv(path)
+        lats.append(df["latitude"].to_numpy(dtype=float))
+        lons.append(df["longitude"].to_numpy(dtype=float))
+        print(f"[OK] {path.name}: {len(df)} POI")
+
+    if not lats:
+        print(f"[WARN] {DATA_DIR} içinde csv yok, maske üretilmedi")
+        return
+
+    mask = build_land_mask(np.concatenate(lats), np.concatenate(lons), CITY_BBOX)
+    mask.save(MASK_PATH)
+    print(f"[OK] {mask} -> {MASK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# scripts/build_poi_store.py
+"""
+INPUTS içindeki tüm POI csv'lerini tek bir kolon bazlı depoya derler
+(datasets/poi_store). Skorlama tarafı bu depoyu memory-map ile açıyor,
+böylece her istekte csv okumuyoruz.
+
+Veri güncellenince (filter_*_main.py sonrası) bunu tekrar çalıştırmak yeterli;
+depo eskiyse scorer kendiliğinden csv'ye düşüyor.
+"""
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.poi_store import STORE_DIR, build_store
+from scripts.scoring_grid import INPUTS, data_version, load_poi_csv
+
+
+def main():
+    frames = {}
+    for cat, path in INPUTS.items():
+        if not path.exists():
+            print(f"[WARN] {cat} atlandı, dosya yok: {path}")
+            continue
+        frames[cat] = load_poi_csv(path)
+        print(f"[OK] {cat}: {len(frames[cat])} POI")
+
+    out_dir = build_store(frames, STORE_DIR, data_version=data_version(frames.keys()))
+    print(f"[OK] POI deposu yazıldı: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# scripts/build_preset_tiles.py
+"""
+user_profiles.json'daki preset profillerin skor yüzeylerini statik tile
+piramidine yazar (static/tiles/<profile_id>/{z}/{x}/{y}.png + meta.json).
+Ayrıntı: core/map_tiles.py. Veri güncellenince tekrar çalıştırmak yeterli;
+app eski piramidi (anahtar tutmuyor) kullanmıyor, PNG overlay'e düşüyor.
+
+    python scripts/build_preset_tiles.py                 -> tüm presetler
+    python scripts/build_preset_tiles.py student         -> sadece verilenler
+    python scripts/build_preset_tiles.py --max-zoom=14   -> daha az tile
+"""
+from pathlib import Path
+import sys
+import time
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.map_tiles import TILE_CELL_KM, TILE_MAX_ZOOM, TILE_MIN_ZOOM, build_tiles, tile_dir, tiles_key
+from scripts.scoring_engine import ScoringEngine
+from scripts.scoring_grid import load_profiles_json, score_surface
+
+
+def main():
+    args = sys.argv[1:]
+    min_zoom, max_zoom = TILE_MIN_ZOOM, TILE_MAX_ZOOM
+    for a in args:
+        if a.startswith("--min-zoom="):
+            min_zoom = int(a.split("=", 1)[1])
+        elif a.startswith("--max-zoom="):
+            max_zoom = int(a.split("=", 1)[1])
+    wanted = [a for a in args if not a.startswith("--")]
+
+    profiles = load_profiles_json()
+    if wanted:
+        profiles = [p for p in profiles if p["profile_id"] in wanted]
+        missing = set(wanted) - {p["profile_id"] for p in profiles}
+        for pid in sorted(missing):
+            print(f"[WARN] {pid} user_profiles.json'da yok, atlandı")
+
+    # sayımlar tüm presetler için tek motordan (tek indeks, grid başına tek küp)
+    engine = ScoringEngine()
+    grid = engine.grid(TILE_CELL_KM)
+
+    for profile in profiles:
+        pid = profile["profile_id"]
+        t0 = time.time()
+        cell_id, scores = score_surface(profile, cell_km=TILE_CELL_KM, engine=engine)
+        meta = build_tiles(
+            grid,
+            cell_id,
+            scores,
+            tile_dir(pid),
+            min_zoom=min_zoom,
+            max_zoom=max_zoom,
+            meta={
+                "profile_id": pid,
+                "data_version": engine.data_version,
+                "key": tiles_key(profile, engine.data_version, grid.mask_tag),
+            },
+        )
+        print(f"[OK] {pid}: {meta['tiles']} tile (z{min_zoom}-{max_zoom}) | {time.time() - t0:.1f} sn -> {tile_dir(pid)}")
+
+
+if __name__ == "__main__":
+    main()
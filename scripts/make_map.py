@@ -1,90 +1,273 @@
+from __future__ import annotations
+
+from functools import lru_cache
 from pathlib import Path
+import base64
 import json
-import math
+import sys
 import folium
+import numpy as np
+from branca.element import MacroElement
 from folium.features import DivIcon
+from jinja2 import Template
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.spatial_index import build_index
+
 OUT_MAPS = BASE_DIR / "outputs" / "maps"
 OUT_MAPS.mkdir(parents=True, exist_ok=True)
 
+# "template": taban harita (folium Map + katmanlar + JS) process başına bir kere
+#             render ediliyor, istek başına sadece veri (JSON) enjekte ediliyor (varsayılan)
+# "circles": eski hali, her nokta için ayrı folium.Circle / Marker
+MAP_RENDERS = ("template", "circles")
+MAP_RENDER = "template"
 
-def haversine_m(lat1, lon1, lat2, lon2):
-    R = 6371000  # Dünya yarıçapı (metre)
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
+# koordinat yuvarlama (6 hane ~ 10 cm, haritada fark yok, html küçülüyor)
+COORD_DECIMALS = 6
 
-    a = (
-        math.sin(dphi / 2) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    )
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+DEFAULT_CENTER = (41.02, 29.00)
 
+TOP_COLOR = "#d7191c"
+OTHER_COLOR = "#2b83ba"
+
+# skor yüzeyi rasteri (core.score_raster) saydamlığı
+OVERLAY_OPACITY = 0.6
+
+RANK_ICON_STYLE = (
+    "background:#d7191c;color:white;border-radius:50%;width:30px;height:30px;"
+    "text-align:center;line-height:30px;font-size:14px;font-weight:bold;"
+    "box-shadow:0 0 6px rgba(0,0,0,0.6);"
+)
 
-def make_map(
-    geojson_path: Path,
-    out_html: Path,
-    top_points: list,
-    top_n: int = 400,
-    radius_m: int = 1000,
-) -> None:
 
+def _candidate_points(geojson_path: Path | None, scored_df, top_n: int) -> tuple[list, list]:
+    """
+    Haritadaki aday noktalar [(lat, lon)] + skorları.
+    scored_df verilirse direkt DataFrame'den (disk yok), yoksa GeoJSON dosyasından.
+    """
+    if scored_df is not None:
+        head = scored_df.head(top_n)
+        points = list(zip(head["latitude"].astype(float).tolist(), head["longitude"].astype(float).tolist()))
+        return points, head["score_total"].astype(float).tolist()
 
     data = json.loads(geojson_path.read_text(encoding="utf-8"))
-    features = data["features"]
+    feats = data["features"][:top_n]
+    points = [(f["geometry"]["coordinates"][1], f["geometry"]["coordinates"][0]) for f in feats]
+    return points, [float(f["properties"].get("score_total", 0.0)) for f in feats]
 
 
-    if top_points:
-        center_lat = sum(p["latitude"] for p in top_points) / len(top_points)
-        center_lon = sum(p["longitude"] for p in top_points) / len(top_points)
-    else:
-        center_lat, center_lon = 41.02, 29.00
+def _outside_top_circles(points: list, top_points: list, radius_m: float) -> np.ndarray:
+    """
+    Her aday nokta için: hiçbir top noktanın radius_m dairesine düşmüyor mu?
+    Eskiden (aday x top) çift döngü + skaler haversine'di; artık top noktalar için
+    bir indeks kurulup tüm adaylar tek sorguda sayılıyor (kural aynı: haversine <= radius_m).
+    """
+    if not points:
+        return np.zeros(0, dtype=bool)
+    if not top_points:
+        return np.ones(len(points), dtype=bool)
 
-    m = folium.Map(
-        location=(center_lat, center_lon),
-        zoom_start=11,
-        tiles="OpenStreetMap"
+    index = build_index(
+        [float(row["latitude"]) for row in top_points],
+        [float(row["longitude"]) for row in top_points],
     )
+    lat, lon = np.asarray(points, dtype=float).T
+    return index.count_within(lat, lon, radius_m) == 0
 
 
-    other_layer = folium.FeatureGroup(
-        name="Diğer Uygun Lokasyonlar",
-        show=True
+# şablondaki yer tutucu: istek başına yerine veri JSON'u geliyor
+DATA_PLACEHOLDER = "__NESTFITTER_MAP_DATA__"
+
+
+class MapDataLayers(MacroElement):
+    """
+    Taban şablonun veri kısmı: sayfadaki tek JSON'dan (DATA_PLACEHOLDER) katmanları kuruyor.
+    - center: harita merkezi
+    - other: {lat, lon, q} diğer lokasyonlar; tarayıcıda tek L.geoJSON katmanına
+      çevriliyor (pointToLayer -> daire, style -> dolgu opaklığı q = 0..1 skora göre)
+    - top: {lat, lon, rank, score} numaralı TOP noktalar
+    - overlay / tiles: skor yüzeyi (PNG data URL ya da tile piramidi), opsiyonel
+    Daireler ortak bir canvas renderer'da (binlerce DOM elemanı yok).
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            (function (map, others, control) {
+                var data = {{ this.placeholder }};
+                map.setView(data.center, map.getZoom());
+
+                // skor yüzeyi: taban harita ile daireler arasında
+                var pane = map.createPane("scoreSurface");
+                pane.style.zIndex = 350;
+                pane.style.pointerEvents = "none";
+                if (data.overlay) {
+                    var img = L.imageOverlay(data.overlay.url, data.overlay.bounds, {
+                        opacity: data.opacity, pane: "scoreSurface", interactive: false
+                    }).addTo(map);
+                    if (img.getElement()) { img.getElement().style.imageRendering = "pixelated"; }
+                    control.addOverlay(img, "Skor Yüzeyi");
+                }
+                if (data.tiles) {
+                    control.addOverlay(L.tileLayer(data.tiles.url, {
+                        opacity: data.opacity,
+                        pane: "scoreSurface",
+                        minNativeZoom: data.tiles.min_zoom,
+                        maxNativeZoom: data.tiles.max_zoom,
+                        bounds: data.tiles.bounds,
+                        attribution: "NestFitter skor yüzeyi"
+                    }).addTo(map), "Skor Yüzeyi");
+                }
+
+                var renderer = L.canvas({padding: 0.5});
+
+                // diğer lokasyonlar: tek GeoJSON katmanı, stil feature'ın skorundan (q)
+                var o = data.other, features = [];
+                for (var i = 0; i < o.lat.length; i++) {
+                    features.push({
+                        type: "Feature",
+                        geometry: {type: "Point", coordinates: [o.lon[i], o.lat[i]]},
+                        properties: {q: o.q[i]}
+                    });
+                }
+                L.geoJSON({type: "FeatureCollection", features: features}, {
+                    pointToLayer: function (feature, latlng) {
+                        return L.circle(latlng, {radius: data.other_radius_m, renderer: renderer});
+                    },
+                    style: function (feature) {
+                        return {
+                            color: "{{ this.other_color }}", weight: 1, fill: true,
+                            fillOpacity: 0.05 + 0.10 * feature.properties.q
+                        };
+                    }
+                }).addTo(others);
+
+                var t = data.top;
+                for (var j = 0; j < t.lat.length; j++) {
+                    var latlng = [t.lat[j], t.lon[j]];
+                    L.circle(latlng, {
+                        radius: data.radius_m, renderer: renderer,
+                        color: "{{ this.top_color }}", weight: 2, fill: true, fillOpacity: 0.18
+                    }).addTo(map);
+                    L.marker(latlng, {
+                        icon: L.divIcon({
+                            className: "",
+                            iconSize: [30, 30],
+                            iconAnchor: [15, 15],
+                            html: '<div style="{{ this.rank_style }}">' + t.rank[j] + "</div>"
+                        })
+                    }).bindTooltip("TOP " + t.rank[j] + " | Score: " + t.score[j].toFixed(2)).addTo(map);
+                }
+            })({{ this._parent.get_name() }}, {{ this.others.get_name() }}, {{ this.control.get_name() }});
+        {% endmacro %}
+        """
     )
-    m.add_child(other_layer)
 
-    for f in features[:top_n]:
-        lat = f["geometry"]["coordinates"][1]
-        lon = f["geometry"]["coordinates"][0]
+    def __init__(self, others, control):
+        super().__init__()
+        self._name = "MapDataLayers"
+        self.others = others
+        self.control = control
+        self.placeholder = DATA_PLACEHOLDER
+        self.top_color = TOP_COLOR
+        self.other_color = OTHER_COLOR
+        self.rank_style = RANK_ICON_STYLE
+
+
+@lru_cache(maxsize=1)
+def _map_template() -> tuple[str, str]:
+    """
+    Taban html (yer tutucudan önce / sonra), process başına bir kere render ediliyor:
+    folium Map + OSM + "Diğer Uygun Lokasyonlar" grubu + LayerControl + MapDataLayers.
+    """
+    m = folium.Map(location=DEFAULT_CENTER, zoom_start=11, tiles="OpenStreetMap", prefer_canvas=True)
+    others = folium.FeatureGroup(name="Diğer Uygun Lokasyonlar", show=True)
+    m.add_child(others)
+    control = folium.LayerControl(collapsed=False)
+    control.add_to(m)
+    MapDataLayers(others, control).add_to(m)
+
+    html = m.get_root().render()
+    head, sep, tail = html.partition(DATA_PLACEHOLDER)
+    if not sep:
+        raise RuntimeError("Harita şablonunda veri yer tutucusu bulunamadı")
+    return head, tail
+
+
+def _rounded(values) -> list:
+    return np.round(np.asarray(values, dtype=float), COORD_DECIMALS).tolist()
+
+
+def map_payload(points, scores, top_points, radius_m, overlay=None, score_tiles=None) -> dict:
+    """
+    Şablona giden veri: sadece istek başına değişenler (noktalar, skorlar, yarıçap, yüzey).
+    """
+    if top_points:
+        center = [
+            sum(p["latitude"] for p in top_points) / len(top_points),
+            sum(p["longitude"] for p in top_points) / len(top_points),
+        ]
+    else:
+        center = list(DEFAULT_CENTER)
+
+    # diğer lokasyonlar: dolgu opaklığı skora göre (q = 0..1, adaylar içinde)
+    s = np.asarray(scores, dtype=float)
+    span = float(s.max() - s.min()) if len(s) else 0.0
+    q = np.round((s - s.min()) / span, 2) if span > 0 else np.ones(len(s))
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
 
+    payload = {
+        "center": center,
+        "radius_m": float(radius_m),
+        "other_radius_m": int(radius_m * 0.5),
+        "opacity": OVERLAY_OPACITY,
+        "other": {"lat": _rounded(lats), "lon": _rounded(lons), "q": q.tolist()},
+        "top": {
+            "lat": _rounded([row["latitude"] for row in top_points]),
+            "lon": _rounded([row["longitude"] for row in top_points]),
+            "rank": [int(row["rank"]) for row in top_points],
+            "score": [round(float(row["score_total"]), 2) for row in top_points],
+        },
+    }
+    if overlay is not None:
+        png, bounds = overlay
+        payload["overlay"] = {"url": _png_url(png), "bounds": bounds}
+    if score_tiles is not None:
+        payload["tiles"] = {k: score_tiles[k] for k in ("url", "min_zoom", "max_zoom", "bounds")}
+    return payload
 
-        inside_red = False
-        for row in top_points:
-            d = haversine_m(
-                lat,
-                lon,
-                float(row["latitude"]),
-                float(row["longitude"])
-            )
-            if d <= radius_m:
-                inside_red = True
-                break
 
-        if inside_red:
-            continue
+def render_map_html(payload: dict) -> str:
+    """
+    Önbellekteki şablona veriyi yerleştir; folium / dosya sistemi yok.
+    """
+    head, tail = _map_template()
+    # </script> kapanmasın diye "</" kaçırılıyor
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return head + data + tail
 
+
+def _png_url(png: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+def _add_layers_circles(m, other_layer, points, top_points, radius_m) -> None:
+    for lat, lon in points:
         folium.Circle(
             location=(lat, lon),
             radius=int(radius_m * 0.5),
-            color="#2b83ba",
+            color=OTHER_COLOR,
             fill=True,
             fill_opacity=0.10,
             weight=1,
         ).add_to(other_layer)
 
-
     for row in top_points:
         lat = float(row["latitude"])
         lon = float(row["longitude"])
@@ -95,35 +278,126 @@ def make_map(
         folium.Circle(
             location=(lat, lon),
             radius=radius_m,
-            color="#d7191c",
+            color=TOP_COLOR,
             fill=True,
             fill_opacity=0.18,
             weight=2,
         ).add_to(m)
 
-
         folium.Marker(
             location=(lat, lon),
             icon=DivIcon(
                 icon_size=(30, 30),
                 icon_anchor=(15, 15),
-                html=f"""
-                <div style="
-                    background:#d7191c;
-                    color:white;
-                    border-radius:50%;
-                    width:30px;
-                    height:30px;
-                    text-align:center;
-                    line-height:30px;
-                    font-size:14px;
-                    font-weight:bold;
-                    box-shadow:0 0 6px rgba(0,0,0,0.6);
-                ">{rank}</div>
-                """,
+                html=f'<div style="{RANK_ICON_STYLE}">{rank}</div>',
             ),
             tooltip=f"TOP {rank} | Score: {score:.2f}",
         ).add_to(m)
 
+
+def _folium_map(points, top_points, radius_m, overlay=None, score_tiles=None) -> folium.Map:
+    # render="circles": her seferinde baştan folium objeleri (eski yol)
+    center = map_payload([], [], top_points, radius_m)["center"]
+    m = folium.Map(location=center, zoom_start=11, tiles="OpenStreetMap")
+
+    if overlay is not None:
+        png, bounds = overlay
+        folium.raster_layers.ImageOverlay(
+            image=_png_url(png),
+            bounds=bounds,
+            opacity=OVERLAY_OPACITY,
+            name="Skor Yüzeyi",
+            pixelated=True,
+            zindex=1,
+        ).add_to(m)
+
+    if score_tiles is not None:
+        (south, west), (north, east) = score_tiles["bounds"]
+        folium.TileLayer(
+            tiles=score_tiles["url"],
+            attr="NestFitter skor yüzeyi",
+            name="Skor Yüzeyi",
+            overlay=True,
+            opacity=OVERLAY_OPACITY,
+            min_zoom=0,
+            min_native_zoom=int(score_tiles["min_zoom"]),
+            max_native_zoom=int(score_tiles["max_zoom"]),
+            bounds=[[south, west], [north, east]],
+        ).add_to(m)
+
+    other_layer = folium.FeatureGroup(
+        name="Diğer Uygun Lokasyonlar",
+        show=True
+    )
+    m.add_child(other_layer)
+    _add_layers_circles(m, other_layer, points, top_points, radius_m)
     folium.LayerControl(collapsed=False).add_to(m)
-    m.save(str(out_html))
+    return m
+
+
+def make_map_html(
+    geojson_path: Path | None,
+    top_points: list,
+    top_n: int = 400,
+    radius_m: int = 1000,
+    scored_df=None,
+    render: str = MAP_RENDER,
+    overlay: tuple[bytes, list] | None = None,
+    score_tiles: dict | None = None,
+) -> str:
+    """
+    Harita html'i (str), diske yazmadan.
+    geojson_path yerine scored_df (run_profile(in_memory=True) çıktısı)
+    verilebilir; o zaman GeoJSON'u diskten okuyup parse etmiyoruz.
+
+    render: "template" (önbellekteki şablon + veri JSON'u) ya da "circles" (nokta başına folium objesi).
+    overlay: (png, bounds) verilirse tüm grid'in skor yüzeyi tek resim olarak
+    dairelerin altına ekleniyor (core.score_raster.score_png / image_bounds).
+    score_tiles: preset'in statik tile piramidi (core.map_tiles.load_tile_meta);
+    verilirse skor yüzeyi resim yerine TileLayer olarak, tarayıcı tile'ları kendisi çekiyor.
+    """
+    if render not in MAP_RENDERS:
+        raise ValueError(f"Bilinmeyen render: {render} | seçenekler: {MAP_RENDERS}")
+
+    points, scores = _candidate_points(geojson_path, scored_df, top_n)
+
+    # kırmızı dairelerin içine düşenleri çizmiyoruz (tek vektörel test)
+    outside = _outside_top_circles(points, top_points, radius_m)
+    scores = [sc for sc, keep in zip(scores, outside) if keep]
+    points = [p for p, keep in zip(points, outside) if keep]
+
+    if render == "template":
+        return render_map_html(map_payload(points, scores, top_points, radius_m, overlay, score_tiles))
+    return _folium_map(points, top_points, radius_m, overlay, score_tiles).get_root().render()
+
+
+def make_map(
+    geojson_path: Path | None,
+    out_html: Path,
+    top_points: list,
+    top_n: int = 400,
+    radius_m: int = 1000,
+    scored_df=None,
+    render: str = MAP_RENDER,
+    overlay: tuple[bytes, list] | None = None,
+    score_tiles: dict | None = None,
+) -> Path:
+    """
+    make_map_html + out_html'e yazma (terminal / eski kullanım);
+    dosya istemeyen make_map_html'i çağırsın.
+    Dönüş: html dosyasının yolu.
+    """
+    html = make_map_html(
+        geojson_path,
+        top_points,
+        top_n=top_n,
+        radius_m=radius_m,
+        scored_df=scored_df,
+        render=render,
+        overlay=overlay,
+        score_tiles=score_tiles,
+    )
+
+    out_html = Path(out_html)
+    out_html.write_text(html, encoding="utf-8")
+    return out_html
@@ -1,5 +1,5 @@
+import sys
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import folium
 
@@ -9,25 +9,18 @@ import folium
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "datasets" / "clean_csv"
 
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.grid import get_grid
+from core.spatial_index import build_index
+
 # ==================================================
 # AYARLAR
 # ==================================================
 GRID_SIZE_KM = 1.0
 RADIUS_M = 1000  # 1 km
 
-# ==================================================
-# HAVERSINE
-# ==================================================
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371000  # metre
-    phi1 = np.radians(lat1)
-    phi2 = np.radians(lat2)
-    dphi = np.radians(lat2 - lat1)
-    dlambda = np.radians(lon2 - lon1)
-
-    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
-    return 2 * R * np.arcsin(np.sqrt(a))
-
 # ==================================================
 # POI YÜKLE
 # ==================================================
@@ -60,37 +53,14 @@ def load_poi(csv_name):
 # GRID OLUŞTUR
 # ==================================================
 def create_grid():
-    dfs = []
-    for f in DATA_DIR.glob("istanbul_*.csv"):
-        df = pd.read_csv(f)
-        dfs.append(df)
-
-    all_df = pd.concat(dfs, ignore_index=True)
-
-    min_lat, max_lat = all_df["latitude"].min(), all_df["latitude"].max()
-    min_lon, max_lon = all_df["longitude"].min(), all_df["longitude"].max()
-
-    # 1 km grid adımı (coğrafi doğru)
-    step_lat = GRID_SIZE_KM / 111
-    step_lon = GRID_SIZE_KM / (111 * np.cos(np.radians((min_lat + max_lat) / 2)))
-
-    grid = []
-    grid_id = 0
-
-    lat = min_lat
-    while lat <= max_lat:
-        lon = min_lon
-        while lon <= max_lon:
-            grid.append({
-                "grid_id": grid_id,
-                "latitude": lat,
-                "longitude": lon
-            })
-            grid_id += 1
-            lon += step_lon
-        lat += step_lat
-
-    grid_df = pd.DataFrame(grid)
+    # sabit şehir bbox'u üzerinde, cell_km başına bir kere kurulan grid
+    grid = get_grid(GRID_SIZE_KM)
+
+    grid_df = pd.DataFrame({
+        "grid_id": grid.cell_id,
+        "latitude": grid.latitude,
+        "longitude": grid.longitude
+    })
     return grid_df
 
 
@@ -117,38 +87,38 @@ def score_grids(weights: dict):
         k: load_poi(v) for k, v in poi_map.items()
     }
 
-    scores = []
+    # her kategori için bir kere indeks kurup tüm grid'i tek sorguda sayıyoruz
+    grid_lat = grid_df["latitude"].to_numpy(dtype=float)
+    grid_lon = grid_df["longitude"].to_numpy(dtype=float)
 
-    for _, grid in grid_df.iterrows():
-        total_score = 0
-        breakdown = {}
+    counts_by_key = {}
+    for poi_key in weights.keys():
+        if poi_key not in poi_data:
+            continue
 
-        for poi_key, weight in weights.items():
-            if poi_key not in poi_data:
-                continue
+        poi_df = poi_data[poi_key]
+        if poi_df.empty:
+            continue
 
-            poi_df = poi_data[poi_key]
-            if poi_df.empty:
-                continue
+        index = build_index(poi_df["latitude"].values, poi_df["longitude"].values)
+        counts = index.count_within(grid_lat, grid_lon, RADIUS_M)
+        counts_by_key[poi_key] = counts
 
-            dists = haversine(
-                grid["latitude"],
-                grid["longitude"],
-                poi_df["latitude"].values,
-                poi_df["longitude"].values
-            )
+    scores = []
 
-            count = int((dists <= RADIUS_M).sum())
-            if count > 0:
-                print(f"[DEBUG] {poi_key}: {count} bulundu")
+    for i, grid in enumerate(grid_df.itertuples(index=False)):
+        total_score = 0
+        breakdown = {}
 
+        for poi_key, counts in counts_by_key.items():
+            count = int(counts[i])
             breakdown[poi_key] = count
-            total_score += count * weight
+            total_score += count * weights[poi_key]
 
         scores.append({
-            "grid_id": grid["grid_id"],
-            "latitude": grid["latitude"],
-            "longitude": grid["longitude"],
+            "grid_id": grid.grid_id,
+            "latitude": grid.latitude,
+            "longitude": grid.longitude,
             "score": total_score,
             "breakdown": breakdown
         })
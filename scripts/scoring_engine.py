@@ -0,0 +1,193 @@
+# scripts/scoring_engine.py
+"""
+Process boyunca yaşayan skorlama motoru.
+
+Streamlit her etkileşimde app.py'yi baştan çalıştırıyor. Motoru
+st.cache_resource ile bir kere kurunca:
+- POI koordinatları (depo/csv) bir kere yükleniyor
+- grid'ler, tüm kategorilerin birleşik indeksi ve mesafe küpleri RAM'de kalıyor
+- sıcak istekte (aynı cell_km daha önce görülmüşse) hiç dosya okunmuyor/yazılmıyor
+
+score() sonucu DataFrame olarak döner; diske yazmak çağıranın işi.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.count_cache import CountMatrix
+from core.distance_cube import MAX_RADIUS_M, DistanceCube
+from core.grid import Grid, get_grid
+from core.spatial_index import DEFAULT_BACKEND, UnionIndex
+from scripts.scoring_grid import (
+    INPUTS,
+    data_version,
+    load_pois,
+    profile_nearest,
+    profile_scores,
+    saturating_scores,
+    score_from_matrix,
+)
+
+# Aynı anda RAM'de tutulan (radius, cell_km) sayım matrisi sayısı
+MAX_MATRICES = 32
+
+
+class ScoringEngine:
+    """
+    POI'ler + birleşik indeks + grid başına mesafe küpleri.
+    Tek process'te bir tane olması yeterli (bkz. get_engine).
+    """
+
+    def __init__(self, index_backend: str = DEFAULT_BACKEND):
+        self.index_backend = index_backend
+
+        # hangi kategoriler mevcut: kurulumda bir kere bakıyoruz
+        self.available = [cat for cat, path in INPUTS.items() if path.exists()]
+        self.data_version = data_version(self.available)
+        self.pois: dict[str, pd.DataFrame] = load_pois(self.available)
+
+        self._index: UnionIndex | None = None
+        self._cubes: dict[float, DistanceCube] = {}
+        self._matrices: "OrderedDict[tuple, CountMatrix]" = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"ScoringEngine(categories={len(self.available)}, data_version={self.data_version})"
+
+    # ---------- parçalar (lazy) ----------
+
+    def grid(self, cell_km: float) -> Grid:
+        return get_grid(cell_km)
+
+    def index(self) -> UnionIndex:
+        # tüm kategoriler tek indekste; sayımlar kategori koduna göre ayrılıyor
+        if self._index is None:
+            points = {
+                cat: (self.pois[cat]["latitude"].to_numpy(), self.pois[cat]["longitude"].to_numpy())
+                for cat in self.available
+            }
+            self._index = UnionIndex(points, backend=self.index_backend)
+        return self._index
+
+    def cube(self, cell_km: float) -> DistanceCube:
+        key = float(cell_km)
+        cube = self._cubes.get(key)
+        if cube is None:
+            grid = self.grid(cell_km)
+            cube = DistanceCube.build(self.index(), grid.latitude, grid.longitude, MAX_RADIUS_M)
+            self._cubes[key] = cube
+        return cube
+
+    def counts(self, cell_km: float, radius_m: int) -> np.ndarray:
+        """
+        (hücre x kategori) sayımlar, kolonlar self.available sırasında.
+        """
+        if radius_m > MAX_RADIUS_M:
+            grid = self.grid(cell_km)
+            return self.index().count_within(grid.latitude, grid.longitude, radius_m)
+        return self.cube(cell_km).count_matrix(radius_m)
+
+    def count_matrix(self, radius_m: int, cell_km: float) -> CountMatrix:
+        """
+        Mevcut tüm kategoriler için G x C sayım matrisi.
+        Profil hangi kategoriyi seçerse seçsin aynı matris kullanılıyor.
+        """
+        key = (int(radius_m), float(cell_km))
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            self._matrices.move_to_end(key)
+            return matrix
+
+        grid = self.grid(cell_km)
+        counts = self.counts(cell_km, radius_m).astype(np.int32)
+
+        matrix = CountMatrix(
+            self.available, grid.latitude, grid.longitude, counts, saturating_scores(counts), cell_id=grid.cell_id
+        )
+        self._matrices[key] = matrix
+        while len(self._matrices) > MAX_MATRICES:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    # ---------- skorlama ----------
+
+    def check_profile(self, profile: dict) -> None:
+        """
+        profile_categories ile aynı kural ama diske bakmadan:
+        must_have bir kategori dosyası yoksa net hata.
+        """
+        for cat in profile.get("must_have", []) or []:
+            if cat in INPUTS and cat not in self.pois:
+                raise FileNotFoundError(f"Eksik dosya: {INPUTS[cat]}")
+
+        wanted = list(profile.get("weights", {}).keys()) + list(profile.get("avoid", []) or [])
+        if not any(cat in self.pois for cat in wanted + list(profile.get("must_have", []) or [])):
+            raise ValueError("Hiç POI yüklenemedi. weights/must_have ve dosya yollarını kontrol et.")
+
+    def score(self, profile: dict, cell_km: float = 1.0, top_n: int = 5000) -> pd.DataFrame:
+        """
+        run_profile ile aynı skor, ama sonuç bellekte (DataFrame) dönüyor.
+        """
+        self.check_profile(profile)
+        radius_m = int(profile.get("radius_m", 1000))
+        # en yakın POI mesafeleri (profile["nearest"]): yarıçaptan bağımsız, grid başına cache'li
+        nearest = profile_nearest(profile, self.grid(cell_km), self.pois, index_backend=self.index_backend)
+        return score_from_matrix(self.count_matrix(radius_m, cell_km), profile, top_n=top_n, nearest=nearest)
+
+    def surface(self, profile: dict, cell_km: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Tüm grid'in skoru: (cell_id, score_total); skor yüzeyi rasteri için.
+        """
+        self.check_profile(profile)
+        radius_m = int(profile.get("radius_m", 1000))
+        matrix = self.count_matrix(radius_m, cell_km)
+        nearest = profile_nearest(profile, self.grid(cell_km), self.pois, index_backend=self.index_backend)
+        return matrix.cell_id, profile_scores(matrix, profile, nearest=nearest)[4]
+
+    # ---------- bakım ----------
+
+    def is_stale(self) -> bool:
+        # csv'ler güncellendi mi? (dosya sistemine bakar, sıcak yolda çağırmıyoruz)
+        return data_version([cat for cat, path in INPUTS.items() if path.exists()]) != self.data_version
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Yaklaşık bellek kullanımı (byte), parça parça.
+        """
+        grids = {}
+        for cell_km in set(self._cubes) | {key[1] for key in self._matrices}:
+            g = self.grid(cell_km)
+            grids[cell_km] = g.latitude.nbytes + g.longitude.nbytes + g.cell_id.nbytes
+
+        usage = {
+            "pois": int(sum(df.memory_usage(index=True, deep=True).sum() for df in self.pois.values())),
+            "indexes": int(self._index.nbytes) if self._index is not None else 0,
+            "cubes": int(sum(c.nbytes for c in self._cubes.values())),
+            "matrices": int(sum(m.nbytes for m in self._matrices.values())),
+            "grids": int(sum(grids.values())),
+        }
+        usage["total"] = int(sum(usage.values()))
+        return usage
+
+
+_ENGINE: ScoringEngine | None = None
+
+
+def get_engine(refresh: bool = False) -> ScoringEngine:
+    """
+    Process başına tek motor (Streamlit dışında, terminalden kullanım için).
+    App tarafında st.cache_resource + TTL'li is_stale kontrolü var (app.get_engine).
+    refresh=True: csv'ler değiştiyse (is_stale) motor yeniden kuruluyor.
+    """
+    global _ENGINE
+    if _ENGINE is None or (refresh and _ENGINE.is_stale()):
+        _ENGINE = ScoringEngine()
+    return _ENGINE
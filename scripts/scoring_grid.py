@@ -1,12 +1,38 @@
 # scripts/scoring_grid.py
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+import hashlib
 import json
 import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+import numpy as np
 import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    # scripts/ altından direkt çalıştırınca da core/ import edilebilsin
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.breakdown import BreakdownView, contrib_column
+from core.count_cache import CountMatrix, CountMatrixCache, matrix_key
+from core.density_raster import density_at
+from core.grid import CITY_BBOX, Grid, format_cell_ids, get_grid
+from core.hexgrid import HexGrid
+from core.land_mask import load_land_mask
+from core.nearest import NEAREST_RANKS, get_nearest, nearest_column, nearest_distances, nearest_term, proximity_scores
+from core.distance_cube import MAX_RADIUS_M, DistanceCube, get_cube
+from core.geodesy import haversine_m  # noqa: F401  (eski import yolu: scripts.scoring_grid.haversine_m)
+from core.parallel_counts import count_matrix_parallel, warm_pool
+from core.poi_store import POIStore, build_store, open_store
+from core.quadtree import level_nodes, node_geometry, nth_largest, split, top_level
+from core.spatial_index import DEFAULT_BACKEND, UnionIndex, backend_mode, build_index
+from core.tiling import TILE_KM, PointWindow, TileChunkWriter, block_bbox, tile_blocks
 
 OUT_SCORING = BASE_DIR / "outputs" / "scoring"
 OUT_SCORING.mkdir(parents=True, exist_ok=True)
@@ -33,6 +59,10 @@ INPUTS = {
     "bar_main": BASE_DIR / "datasets" / "bar_output" / "bars_main.csv",
     "school_private": BASE_DIR / "datasets" / "school_output" / "schools_private.csv",
     "school_courses": BASE_DIR / "datasets" / "school_output" / "schools_courses.csv",
+    # clean_csv'den direkt (ayrı filtre adımı yok)
+    "mosque_main": BASE_DIR / "datasets" / "clean_csv" / "istanbul_mosques.csv",
+    "theatre_main": BASE_DIR / "datasets" / "clean_csv" / "istanbul_theatres.csv",
+    "convenience_main": BASE_DIR / "datasets" / "clean_csv" / "istanbul_convenience_stores.csv",
 }
 
 REQUIRED_COLS = ["latitude", "longitude"]
@@ -62,31 +92,17 @@ def load_poi_csv(path: Path) -> pd.DataFrame:
     return df
 
 
-def haversine_m(lat1, lon1, lat2, lon2) -> float:
-    """
-    İki nokta arası mesafeyi metre cinsinden buluyor.
-    Çünkü 'radius_m' ile “1km içinde kaç tane var?” gibi hesap yapacağız.
-    """
-    R = 6371000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dl = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dl / 2) ** 2
-    return 2 * R * math.asin(math.sqrt(a))
-
-
 def bbox_from_pois(pois: dict[str, pd.DataFrame]) -> tuple[float, float, float, float]:
     """
-    Semt shapefile yoksa İstanbul'u “grid” yapacağız.
-    Grid için bir alan (bbox) lazım.
-    Bbox'u: tüm POI noktalarının min/max lat lon'una göre çıkartıyoruz.
+    Verilen POI'lerin min/max lat lon'u (+ küçük pay).
+    Not: skorlama artık sabit şehir bbox'unu (core.grid.CITY_BBOX) kullanıyor;
+    bu fonksiyon sadece özel bir alan için grid kurmak istersek lazım.
     """
-    all_df = pd.concat([df[["latitude", "longitude"]] for df in pois.values()], ignore_index=True)
-    min_lat = float(all_df["latitude"].min())
-    max_lat = float(all_df["latitude"].max())
-    min_lon = float(all_df["longitude"].min())
-    max_lon = float(all_df["longitude"].max())
+    frames = [df for df in pois.values() if len(df)]
+    min_lat = min(float(df["latitude"].min()) for df in frames)
+    max_lat = max(float(df["latitude"].max()) for df in frames)
+    min_lon = min(float(df["longitude"].min()) for df in frames)
+    max_lon = max(float(df["longitude"].max()) for df in frames)
 
     # küçük buffer: sınırda kalmasın diye
     pad_lat = 0.02
@@ -94,55 +110,151 @@ def bbox_from_pois(pois: dict[str, pd.DataFrame]) -> tuple[float, float, float,
     return (min_lat - pad_lat, min_lon - pad_lon, max_lat + pad_lat, max_lon + pad_lon)
 
 
-def build_grid(bbox, cell_km=1.0) -> pd.DataFrame:
+def build_grid(bbox=CITY_BBOX, cell_km=1.0) -> pd.DataFrame:
     """
     İstanbul yerine “grid hücreleri” oluşturuyoruz.
     1km x 1km gibi düşünebilirsin.
-    Sonra her hücrenin merkezini skorlayacağız.
+    Hesap core.grid.Grid'de (np.arange, döngü yok); burası DataFrame hali.
+    """
+    return Grid(bbox, cell_km, mask=load_land_mask()).to_frame()
+
+
+def count_within_radius(grid: pd.DataFrame, poi: pd.DataFrame, radius_m: int, index=None) -> np.ndarray:
+    """
+    Her grid noktası için:
+    “radius_m içinde kaç POI var?” sayıyoruz.
+    Artık hücre hücre gezmiyoruz: POI'ler için bir mekânsal indeks kurup
+    (ya da hazır gelen index'i kullanıp) tüm hücreleri tek sorguda sayıyoruz.
+    Mesafe kuralı aynı: haversine (metre) <= radius_m.
     """
-    min_lat, min_lon, max_lat, max_lon = bbox
+    if index is None:
+        index = build_index(poi["latitude"].to_numpy(), poi["longitude"].to_numpy())
+    return index.count_within(grid["latitude"].to_numpy(), grid["longitude"].to_numpy(), radius_m)
 
-    # 1 derece enlem ~ 111km. Bu yüzden km -> derece dönüşümü yapıyoruz.
-    lat_step = cell_km / 111.0
 
-    # boylam dönüşümü enleme göre değişiyor (cos(lat) var)
-    mid_lat = (min_lat + max_lat) / 2
-    lon_step = cell_km / (111.0 * math.cos(math.radians(mid_lat)))
+def _data_stamp(cat: str) -> int:
+    # csv değişirse cache anahtarı da değişsin
+    path = INPUTS.get(cat)
+    return path.stat().st_mtime_ns if path is not None and path.exists() else 0
 
-    lats, lons = [], []
-    lat = min_lat
-    while lat <= max_lat:
-        lon = min_lon
-        while lon <= max_lon:
-            lats.append(lat + lat_step / 2)  # hücre merkezi
-            lons.append(lon + lon_step / 2)
-            lon += lon_step
-        lat += lat_step
 
-    grid = pd.DataFrame({"latitude": lats, "longitude": lons})
-    grid["target_id"] = [f"cell_{i:06d}" for i in range(len(grid))]
-    grid["name"] = grid["target_id"]
-    return grid
+# altıgen grid'de indeks yerine halka toplamı ile sayım (yaklaşık)
+HEX_RING_BACKEND = "hexring"
+# indeks yerine FFT ile yoğunluk rasteri (core.density_raster, yaklaşık, hızlı yol değil)
+FFT_BACKEND = "fft"
 
+# indeks kurmayan sayım yolları: seri çalışıyor, mesafe küpü yok
+RASTER_BACKENDS = (HEX_RING_BACKEND, FFT_BACKEND)
 
-def count_within_radius(grid: pd.DataFrame, poi: pd.DataFrame, radius_m: int) -> list[int]:
+
+def _distance_mode(index_backend: str) -> str:
+    # cache anahtarı için: "exact" / "fast" / "hexring" / "fft"
+    return index_backend if index_backend in RASTER_BACKENDS else backend_mode(index_backend)
+
+
+def category_counts(
+    cat: str,
+    poi: pd.DataFrame,
+    grid: Grid,
+    radius_m: int,
+    index_backend: str = DEFAULT_BACKEND,
+) -> np.ndarray:
     """
-    Her grid noktası için:
-    “radius_m içinde kaç POI var?” sayıyoruz.
-    Şu an naive (yavaş) ama ilk demo için yeter.
-    Gerekirse sonra optimize ederiz.
-    """
-    poi_points = list(zip(poi["latitude"].tolist(), poi["longitude"].tolist()))
-
-    counts = []
-    for _, row in grid.iterrows():
-        lat, lon = float(row["latitude"]), float(row["longitude"])
-        c = 0
-        for plat, plon in poi_points:
-            if haversine_m(lat, lon, plat, plon) <= radius_m:
-                c += 1
-        counts.append(c)
-    return counts
+    count_within_radius'un cache'li hali.
+    Aynı kategori + aynı grid için MAX_RADIUS_M içindeki mesafeleri bir kere
+    hesaplayıp (DistanceCube) saklıyoruz; yarıçap değişince sadece sayım yapılıyor.
+    grid altıgen ve index_backend="hexring" ise: POI'ler altıgenlere sayılıp
+    halkalar toplanıyor (yaklaşık, bkz. HexGrid.ring_count_within).
+    index_backend="fft": POI rasteri disk çekirdeğiyle konvolüsyon (yaklaşık,
+    sapma için core.density_raster.count_deviation). İndeksli yoldan hızlı
+    değil (kategori başına ~0.3 sn, 1 km grid); karşılaştırma / çok büyük POI
+    setleri için.
+    """
+    if index_backend == FFT_BACKEND:
+        lat, lon = poi["latitude"].to_numpy(), poi["longitude"].to_numpy()
+        return density_at(lat, lon, grid.latitude, grid.longitude, radius_m)
+    if index_backend == HEX_RING_BACKEND:
+        if not isinstance(grid, HexGrid):
+            raise ValueError(f'"{HEX_RING_BACKEND}" sadece altıgen grid ile kullanılabilir')
+        return grid.ring_count_within(poi["latitude"].to_numpy(), poi["longitude"].to_numpy(), radius_m)
+
+    def _index():
+        return build_index(poi["latitude"].to_numpy(), poi["longitude"].to_numpy(), backend=index_backend)
+
+    if radius_m > MAX_RADIUS_M:
+        # slider dışı bir yarıçap: küpü bozmayalım, direkt sayalım
+        return _index().count_within(grid.latitude, grid.longitude, radius_m)
+
+    key = (cat, _data_stamp(cat), len(poi), index_backend) + grid.key
+    cube = get_cube(key, lambda: DistanceCube.build(_index(), grid.latitude, grid.longitude, MAX_RADIUS_M))
+    return cube.counts(radius_m)
+
+
+def union_counts(
+    pois: dict[str, pd.DataFrame],
+    grid: Grid,
+    radius_m: int,
+    index_backend: str = DEFAULT_BACKEND,
+) -> np.ndarray:
+    """
+    Tüm kategoriler için (hücre x kategori) sayım, tek indeks + tek komşu sorgusuyla
+    (core.spatial_index.UnionIndex); kolonlar pois sırasında.
+    category_counts'taki gibi yarıçaptan bağımsız küp cache'leniyor.
+    """
+    cats = list(pois.keys())
+
+    def _index():
+        points = {cat: (pois[cat]["latitude"].to_numpy(), pois[cat]["longitude"].to_numpy()) for cat in cats}
+        return UnionIndex(points, backend=index_backend)
+
+    if radius_m > MAX_RADIUS_M:
+        return _index().count_within(grid.latitude, grid.longitude, radius_m)
+
+    key = ("union", tuple((cat, _data_stamp(cat), len(pois[cat])) for cat in cats), index_backend) + grid.key
+    cube = get_cube(key, lambda: DistanceCube.build(_index(), grid.latitude, grid.longitude, MAX_RADIUS_M))
+    return cube.count_matrix(radius_m)
+
+
+def nearest_features(
+    cat: str,
+    poi: pd.DataFrame,
+    grid: Grid,
+    index_backend: str = DEFAULT_BACKEND,
+) -> np.ndarray:
+    """
+    (hücre x NEAREST_RANKS) en yakın POI mesafeleri (metre), toplu k-NN sorgusuyla.
+    Yarıçaptan bağımsız: (kategori, grid) başına bir kere hesaplanıp cache'leniyor.
+    Raster sayım yollarında (fft / hexring) k-NN için varsayılan indeks kullanılıyor.
+    """
+    backend = DEFAULT_BACKEND if index_backend in RASTER_BACKENDS else index_backend
+
+    def _build():
+        index = build_index(poi["latitude"].to_numpy(), poi["longitude"].to_numpy(), backend=backend)
+        return nearest_distances(index, grid.latitude, grid.longitude)
+
+    key = ("nearest", cat, _data_stamp(cat), len(poi), backend) + grid.key
+    return get_nearest(key, _build)
+
+
+def profile_nearest(
+    profile: dict,
+    grid: Grid,
+    pois: dict[str, pd.DataFrame] | None = None,
+    index_backend: str = DEFAULT_BACKEND,
+) -> dict[str, np.ndarray]:
+    """
+    profile["nearest"] ({kategori: ağırlık}) kategorileri için mesafe tabloları.
+    pois'te olmayan kategoriler depodan/csv'den yükleniyor; dosyası yoksa atlanıyor.
+    """
+    wanted = [cat for cat in (profile.get("nearest") or {}) if cat in INPUTS]
+    if not wanted:
+        return {}
+
+    pois = dict(pois or {})
+    missing = [cat for cat in wanted if cat not in pois and INPUTS[cat].exists()]
+    if missing:
+        pois.update(load_pois(missing))
+    return {cat: nearest_features(cat, pois[cat], grid, index_backend) for cat in wanted if cat in pois}
 
 
 def saturating_score(count: int) -> float:
@@ -154,111 +266,598 @@ def saturating_score(count: int) -> float:
     return 5.0 * (1 - math.exp(-count / 3.0))
 
 
-def load_pois_for_profile(profile: dict) -> dict[str, pd.DataFrame]:
+def saturating_scores(counts) -> np.ndarray:
     """
-    Profilin weights/must_have/avoid alanlarına bakıp,
-    sadece gereken POI csv’lerini yüklüyoruz.
+    saturating_score'un numpy hali: dizi/matris üzerinde tek seferde.
     """
-    pois = {}
+    return 5.0 * (1 - np.exp(-np.asarray(counts, dtype=float) / 3.0))
+
+
+def avoid_penalty(counts) -> np.ndarray:
+    """
+    avoid kategorilerde “yakınsa daha fazla ceza”: 2'ye kadar sayım kadar, sonrası 2 katı.
+    """
+    c = np.asarray(counts, dtype=float)
+    return np.where(c <= 2, c, c * 2)
+
+
+def profile_categories(profile: dict) -> list[str]:
+    """
+    load_pois_for_profile'ın yükleyeceği kategoriler, csv okumadan.
+    Cache anahtarı için lazım; kurallar aynı:
+    weights/avoid "varsa", must_have "şart".
+    """
+    cats: list[str] = []
 
-    # weights içindeki kategorileri yükle
     for cat in profile.get("weights", {}).keys():
-        if cat in INPUTS and INPUTS[cat].exists():
-            pois[cat] = load_poi_csv(INPUTS[cat])
+        if cat in INPUTS and INPUTS[cat].exists() and cat not in cats:
+            cats.append(cat)
 
-    # must_have varsa bunlar yoksa projeyi zaten bozar: net hata verelim
     for cat in profile.get("must_have", []) or []:
         if cat in INPUTS:
             _require_file(INPUTS[cat])
-            pois[cat] = load_poi_csv(INPUTS[cat])
+            if cat not in cats:
+                cats.append(cat)
 
-    # avoid varsa ve dosya varsa yükleyelim (yoksa çok problem değil)
     for cat in profile.get("avoid", []) or []:
-        if cat in INPUTS and INPUTS[cat].exists():
-            pois[cat] = load_poi_csv(INPUTS[cat])
+        if cat in INPUTS and INPUTS[cat].exists() and cat not in cats:
+            cats.append(cat)
 
-    if not pois:
+    if not cats:
         raise ValueError("Hiç POI yüklenemedi. weights/must_have ve dosya yollarını kontrol et.")
+    return cats
+
+
+def fresh_poi_store() -> POIStore | None:
+    """
+    Derlenmiş POI deposu (scripts/build_poi_store.py) varsa ve csv'lerle
+    aynı veri versiyonundaysa onu döndür; yoksa None (csv'ye düşüyoruz).
+    """
+    store = open_store()
+    if store is None or store.data_version != data_version(store.categories):
+        return None
+    return store
+
+
+def load_pois(cats) -> dict[str, pd.DataFrame]:
+    """
+    Kategorileri önce memory-map'li depodan, orada yoksa csv'den yüklüyoruz.
+    """
+    store = fresh_poi_store()
+    pois = {}
+    for cat in cats:
+        if store is not None and cat in store:
+            pois[cat] = store.frame(cat)
+        else:
+            pois[cat] = load_poi_csv(INPUTS[cat])
     return pois
 
 
-def score_grid(profile: dict, pois: dict[str, pd.DataFrame], cell_km=1.0) -> pd.DataFrame:
+def load_pois_for_profile(profile: dict) -> dict[str, pd.DataFrame]:
     """
-    Burada gerçek skor çıkıyor.
-    1) grid üret
-    2) her kategori için count çıkar
-    3) count -> puan çevir, weight ile çarp
-    4) must_have kontrolü
+    Profilin weights/must_have/avoid alanlarına bakıp,
+    sadece gereken POI'leri yüklüyoruz.
     """
-    radius_m = int(profile.get("radius_m", 1000))
-    weights: dict = profile.get("weights", {})
-    must_have = profile.get("must_have", []) or []
-    avoid = set(profile.get("avoid", []) or [])
+    return load_pois(profile_categories(profile))
 
-    bbox = bbox_from_pois(pois)
-    grid = build_grid(bbox, cell_km=cell_km)
 
-    score_total = [0.0] * len(grid)
-    breakdown = {}
+def data_version(categories) -> str:
+    """
+    Kategorilerin csv'lerinden (boyut + mtime) kısa bir versiyon etiketi.
+    Veri güncellenince cache anahtarları kendiliğinden değişiyor.
+    """
+    parts = []
+    for cat in sorted(categories):
+        path = INPUTS.get(cat)
+        if path is not None and path.exists():
+            parts.append(f"{cat}:{path.stat().st_size}:{_data_stamp(cat)}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+# (kategori seti, radius, cell_km, veri versiyonu) -> G x C sayım matrisi
+COUNT_CACHE = CountMatrixCache()
+
+
+def _store_matches(store: POIStore | None, pois: dict[str, pd.DataFrame]) -> bool:
+    # worker'lar depodan okuyacak: koordinatlar verilen pois ile birebir aynı mı?
+    if store is None:
+        return False
+    for cat, df in pois.items():
+        if cat not in store:
+            return False
+        lat, lon = store.points(cat)
+        if not (
+            np.array_equal(np.asarray(lat, dtype=float), df["latitude"].to_numpy(dtype=float))
+            and np.array_equal(np.asarray(lon, dtype=float), df["longitude"].to_numpy(dtype=float))
+        ):
+            return False
+    return True
+
+
+def parallel_counts(
+    pois: dict[str, pd.DataFrame],
+    radius_m: int,
+    cell_km=1.0,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = None,
+    grid_kind: str = "square",
+) -> np.ndarray:
+    """
+    build_count_matrix'in process havuzlu hali (core.parallel_counts).
+    Worker'lar POI'leri memory-map'li depodan okuyor: derlenmiş depo bu
+    POI'lerle aynıysa o, değilse geçici bir depo yazılıyor.
+    """
+    cats = list(pois.keys())
+    store = fresh_poi_store()
+    if _store_matches(store, pois):
+        store_dir = store.store_dir
+        return count_matrix_parallel(
+            store_dir, cats, cell_km, radius_m, index_backend=index_backend, workers=workers, grid_kind=grid_kind
+        )
 
-    for cat, w in weights.items():
-        if cat not in pois:
-            continue
+    with tempfile.TemporaryDirectory(prefix="nestfitter_pois_") as tmp:
+        build_store({cat: pois[cat] for cat in cats}, Path(tmp))
+        return count_matrix_parallel(
+            Path(tmp), cats, cell_km, radius_m, index_backend=index_backend, workers=workers, grid_kind=grid_kind
+        )
 
-        counts = count_within_radius(grid, pois[cat], radius_m)
-        grid[f"{cat}_count"] = counts
 
-        # avoid kategorilerde “yakınsa daha fazla ceza” mantığı koyuyoruz
-        if cat in avoid:
-            contrib = [float(w) * (c if c <= 2 else c * 2) for c in counts]
-        else:
-            contrib = [float(w) * saturating_score(c) for c in counts]
+def build_count_matrix(
+    pois: dict[str, pd.DataFrame],
+    radius_m: int,
+    cell_km=1.0,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = 1,
+    grid_kind: str = "square",
+) -> CountMatrix:
+    """
+    Sabit şehir grid'i + yüklenen her kategori için hücre başına sayım.
+    Sonuç profilin ağırlıklarından bağımsız; ağırlıklar sonra çarpılıyor.
+    Seri yolda tüm kategoriler tek birleşik indeksle sayılıyor (union_counts).
+    workers > 1 (ya da None = tüm çekirdekler): (kategori x grid dilimi) işleri
+    process havuzunda; sonuç seri yolla birebir aynı. Havuzun ilk açılışı
+    (spawn + import'lar) saniyeler sürüyor, seri yol 1 km grid'de bunun çok
+    altında: sadece büyük işlerde (ince grid, uzun yaşayan process) açın,
+    gerekiyorsa önce core.parallel_counts.warm_pool.
+    grid_kind="hex": altıgen grid (cell_km = kenar uzunluğu).
+    """
+    grid = get_grid(cell_km, kind=grid_kind)
+
+    cats = list(pois.keys())
+    parallel = (workers is None or workers > 1) and index_backend not in RASTER_BACKENDS
+    if parallel:
+        counts = parallel_counts(
+            pois, radius_m, cell_km=cell_km, index_backend=index_backend, workers=workers, grid_kind=grid_kind
+        )
+    elif index_backend in RASTER_BACKENDS:
+        counts = np.zeros((len(grid), len(cats)), dtype=np.int32)
+        for j, cat in enumerate(cats):
+            counts[:, j] = category_counts(cat, pois[cat], grid, radius_m, index_backend=index_backend)
+    else:
+        # tek indeks, tek sorgu: kategori sayısı maliyeti pek değiştirmiyor
+        counts = union_counts(pois, grid, radius_m, index_backend=index_backend).astype(np.int32)
+
+    return CountMatrix(
+        cats,
+        grid.latitude,
+        grid.longitude,
+        counts,
+        saturating_scores(counts),
+        cell_id=grid.cell_id,
+    )
+
+
+def _cached_count_matrix(
+    cats: list[str],
+    radius_m: int,
+    cell_km,
+    load_pois,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = 1,
+    grid_kind: str = "square",
+) -> CountMatrix:
+    grid = get_grid(cell_km, kind=grid_kind)
+    key = matrix_key(
+        cats,
+        radius_m,
+        cell_km,
+        data_version(cats),
+        bbox=grid.bbox,
+        mode=_distance_mode(index_backend),
+        mask=grid.mask_tag,
+        grid_kind=grid_kind,
+    )
+    matrix = COUNT_CACHE.get(key)
+    if matrix is None:
+        pois = load_pois()
+        matrix = build_count_matrix(
+            {cat: pois[cat] for cat in cats},
+            radius_m,
+            cell_km=cell_km,
+            index_backend=index_backend,
+            workers=workers,
+            grid_kind=grid_kind,
+        )
+        COUNT_CACHE.put(key, matrix)
+    return matrix
 
-        breakdown[cat] = contrib
-        score_total = [st + cc for st, cc in zip(score_total, contrib)]
+
+def get_count_matrix(
+    profile: dict,
+    cell_km=1.0,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = 1,
+    grid_kind: str = "square",
+) -> CountMatrix:
+    """
+    Sayım matrisini cache'ten getir; yoksa csv'leri yükleyip hesapla ve diske yaz.
+    Cache'te varsa hiç csv okunmuyor.
+    """
+    radius_m = int(profile.get("radius_m", 1000))
+    cats = profile_categories(profile)
+    return _cached_count_matrix(
+        cats,
+        radius_m,
+        cell_km,
+        lambda: load_pois_for_profile(profile),
+        index_backend=index_backend,
+        workers=workers,
+        grid_kind=grid_kind,
+    )
+
+
+def top_n_indices(score_total, top_n=None) -> np.ndarray:
+    """
+    En yüksek top_n skorun indeksleri, büyükten küçüğe.
+    Tüm grid'i sıralamak yerine argpartition ile önce top_n'i ayırıp
+    sadece onları sıralıyoruz. Eşit skorlarda hücre sırası (indeks) korunuyor.
+    """
+    score_total = np.asarray(score_total, dtype=float)
+    n = len(score_total)
+    if top_n and 0 < top_n < n:
+        idx = np.argpartition(-score_total, top_n - 1)[:top_n]
+        # argpartition sınırdaki eşit skorlardan rastgele seçebiliyor:
+        # sınır skoruna eşit olanlardan en küçük indekslileri al
+        kth = score_total[idx].min()
+        above = np.flatnonzero(score_total > kth)
+        ties = np.flatnonzero(score_total == kth)[: top_n - len(above)]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(n)
+    order = np.lexsort((idx, -score_total[idx]))
+    return idx[order]
+
+
+def _nearest_weights(profile: dict, nearest: dict | None) -> list[tuple[str, float]]:
+    # profildeki "nearest" terimlerinden mesafe tablosu gelenler, profil sırasında
+    if not nearest:
+        return []
+    return [(cat, float(w)) for cat, w in (profile.get("nearest") or {}).items() if cat in nearest]
+
+
+def profile_scores(matrix: CountMatrix, profile: dict, score_total=None, nearest=None):
+    """
+    score_from_matrix'in hesap kısmı (tablo kurmadan):
+    1) ağırlıklı kategorilerin kolonlarını seç
+    2) avoid olanlara ceza, diğerlerine saturating_score
+    3) skor = matris x ağırlık vektörü
+    4) nearest verilirse ({kategori: (G x NEAREST_RANKS) mesafe}, bkz. profile_nearest):
+       profile["nearest"] ağırlığı x en yakın POI mesafesinin puanı (proximity_scores)
+    5) must_have maskesi
+    score_total dışarıdan gelirse sadece sayım kısmı sayılıyor, nearest terimleri eklenir.
+    Dönüş: (cats, counts, base, w, score_total); base/w'nin son kolonları nearest terimleri.
+    """
+    weights: dict = profile.get("weights", {})
+    must_have = profile.get("must_have", []) or []
+    avoid = set(profile.get("avoid", []) or [])
+
+    cats = [cat for cat in weights.keys() if cat in matrix]
+    cols = [matrix.col(cat) for cat in cats]
+    w = np.array([float(weights[cat]) for cat in cats], dtype=float)
+    is_avoid = np.array([cat in avoid for cat in cats], dtype=bool)
+
+    counts = matrix.counts[:, cols]
+    base = np.where(is_avoid, avoid_penalty(counts), matrix.saturated[:, cols])
+    if score_total is None:
+        # satır satır toplam (base @ w değil): BLAS blok boyutu satır sayısına göre
+        # değişip son haneyi oynatabiliyor; parça parça skorlamada da aynı sonuç çıksın
+        score_total = (base * w).sum(axis=1)
+    score_total = np.asarray(score_total, dtype=float)
+
+    near = _nearest_weights(profile, nearest)
+    if near:
+        radius_m = int(profile.get("radius_m", 1000))
+        prox = np.column_stack([proximity_scores(nearest[cat][:, 0], radius_m) for cat, _ in near])
+        w_near = np.array([wt for _, wt in near], dtype=float)
+        score_total = score_total + (prox * w_near).sum(axis=1)
+        base = np.hstack([base, prox])
+        w = np.concatenate([w, w_near])
 
     # must_have: mesela school_public şart ise,
-    # o hücrenin 1km içinde en az 1 okul yoksa o hücreyi ele
+    # o hücrenin radius içinde en az 1 okul yoksa o hücreyi ele
     if must_have:
-        ok_mask = [True] * len(grid)
+        ok_mask = np.ones(len(matrix), dtype=bool)
         for cat in must_have:
-            col = f"{cat}_count"
-            if col not in grid.columns:
-                ok_mask = [False] * len(grid)
+            if cat not in cats:
+                ok_mask[:] = False
                 break
-            ok_mask = [ok and (int(v) >= 1) for ok, v in zip(ok_mask, grid[col].tolist())]
+            ok_mask &= counts[:, cats.index(cat)] >= 1
+
+        score_total = np.where(ok_mask, score_total, -1e9)
+
+    return cats, counts, base, w, score_total
+
+
+def score_from_matrix(
+    matrix: CountMatrix, profile: dict, score_total=None, top_n=None, nearest=None
+) -> pd.DataFrame:
+    """
+    Sayım matrisinden skor (hesap: profile_scores).
+    top_n verilirse sadece en iyi top_n hücre (sıralı) tabloya giriyor;
+    katkı/count kolonları sadece onlar için üretiliyor.
+    score_total dışarıdan gelirse (parça parça skorlamada hesaplanmış) çarpım atlanıyor.
+    nearest verilirse <kategori>_nearest1_m / _nearest3_m kolonları da ekleniyor
+    (yeterli POI yoksa NaN).
+    """
+    cats, counts, base, w, score_total = profile_scores(matrix, profile, score_total=score_total, nearest=nearest)
+    sel = top_n_indices(score_total, top_n)
+
+    grid = pd.DataFrame({"latitude": matrix.latitude[sel], "longitude": matrix.longitude[sel]})
+    grid["target_id"] = format_cell_ids(matrix.cell_id[sel])
+    grid["name"] = grid["target_id"]
 
-        score_total = [s if ok else -1e9 for s, ok in zip(score_total, ok_mask)]
+    for j, cat in enumerate(cats):
+        grid[f"{cat}_count"] = counts[sel, j]
 
-    grid["score_total"] = score_total
+    for cat, dist in (nearest or {}).items():
+        for k, rank in enumerate(NEAREST_RANKS):
+            d = dist[sel, k]
+            grid[nearest_column(cat, rank)] = np.where(np.isfinite(d), d, np.nan).astype(np.float32)
 
-    # breakdown'u json string tutuyoruz ki csv içinde okunabilir olsun
-    score_breakdown = []
-    for i in range(len(grid)):
-        d = {k: float(breakdown[k][i]) for k in breakdown.keys()}
-        score_breakdown.append(json.dumps(d, ensure_ascii=False))
-    grid["score_breakdown"] = score_breakdown
+    grid["score_total"] = score_total[sel]
+
+    # kırılım: kategori başına katkı sayısal kolonlarda (contrib_<kategori>);
+    # dict/json hali gerekince core.breakdown.BreakdownView ile satır satır üretiliyor
+    terms = cats + [nearest_term(cat) for cat, _ in _nearest_weights(profile, nearest)]
+    contrib = (base[sel] * w).astype(np.float32)
+    for j, term in enumerate(terms):
+        grid[contrib_column(term)] = contrib[:, j]
 
-    grid = grid.sort_values("score_total", ascending=False).reset_index(drop=True)
     return grid
 
 
+def score_grid(
+    profile: dict,
+    pois: dict[str, pd.DataFrame],
+    cell_km=1.0,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = 1,
+    grid_kind: str = "square",
+) -> pd.DataFrame:
+    """
+    Burada gerçek skor çıkıyor.
+    1) sabit şehir grid'ini al (cell_km başına bir kere kuruluyor)
+    2) her kategori için count çıkar (yarıçaptan bağımsız mesafe küpünden)
+    3) count -> puan çevir, weight ile çarp
+    4) must_have kontrolü
+    workers > 1: 2. adım process havuzunda (bkz. build_count_matrix).
+    grid_kind="hex": kare yerine altıgen hücreler (core.hexgrid), çıktı kolonları aynı.
+    index_backend="fft": 2. adım FFT yoğunluk rasterinden (yaklaşık; bu veride
+    varsayılan indeksli yoldan yavaş, bkz. core.density_raster).
+    profile["nearest"] varsa en yakın POI mesafeleri de skora/tabloya giriyor (profile_nearest).
+    """
+    radius_m = int(profile.get("radius_m", 1000))
+    matrix = build_count_matrix(
+        pois, radius_m, cell_km=cell_km, index_backend=index_backend, workers=workers, grid_kind=grid_kind
+    )
+    grid = get_grid(cell_km, kind=grid_kind)
+    nearest = profile_nearest(profile, grid, pois, index_backend=index_backend)
+    return score_from_matrix(matrix, profile, nearest=nearest)
+
+
+def score_grid_tiled(
+    profile: dict,
+    pois: dict[str, pd.DataFrame],
+    cell_km=1.0,
+    top_n=5000,
+    tile_km: float = TILE_KM,
+    out_dir: Path | None = None,
+    index_backend: str = DEFAULT_BACKEND,
+    bbox=CITY_BBOX,
+) -> tuple[pd.DataFrame, Path | None]:
+    """
+    score_grid'in parça parça (out-of-core) hali; ince cell_km / büyük bbox için.
+    - bbox tile_km x tile_km bloklara bölünüyor (core.tiling)
+    - her blokta sadece "blok + yarıçap" içindeki POI'lerle indeks kurulup sayılıyor
+    - bloğun tüm skorları out_dir'e .npy olarak yazılıyor (out_dir=None -> yazılmıyor)
+    - global top_n, blokların top_n'leri ile birleştirilerek tutuluyor
+    RAM'de aynı anda: bir blok + top_n satır (+ POI'ler). Grid hiç tamamı kurulmuyor.
+    Sonuç score_from_matrix(..., top_n=top_n) ile aynı (aynı sıralama kuralı).
+    Dönüş: (top_n tablo, out_dir)
+    """
+    radius_m = int(profile.get("radius_m", 1000))
+    # get_grid değil: cache'e milyonlarca hücre girmesin
+    grid = Grid(bbox, cell_km, mask=load_land_mask())
+    cats = list(pois.keys())
+    windows = {cat: PointWindow(pois[cat]["latitude"], pois[cat]["longitude"]) for cat in cats}
+
+    writer = None
+    if out_dir is not None:
+        meta = {
+            "profile_id": profile.get("profile_id", "custom"),
+            "cell_km": grid.cell_km,
+            "bbox": list(grid.bbox),
+            "mask": grid.mask_tag,
+        }
+        writer = TileChunkWriter(out_dir, meta=meta)
+
+    best = None
+    best_ids = np.empty(0, dtype=np.int64)
+    for block in tile_blocks(grid, tile_km):
+        ids, lat, lon = grid.block(*block)
+        if len(ids) == 0:
+            continue  # tamamı deniz/orman
+        window_bbox = block_bbox(grid, block, radius_m)
+
+        counts = np.zeros((len(ids), len(cats)), dtype=np.int32)
+        for j, cat in enumerate(cats):
+            plat, plon = windows[cat].select(*window_bbox)
+            counts[:, j] = build_index(plat, plon, backend=index_backend).count_within(lat, lon, radius_m)
+
+        matrix = CountMatrix(cats, lat, lon, counts, saturating_scores(counts), cell_id=ids)
+        _, _, _, _, score_total = profile_scores(matrix, profile)
+        if writer is not None:
+            writer.write(ids, score_total)
+
+        # bloğun en iyileri + şimdiye kadarki en iyiler -> yine top_n
+        sel = top_n_indices(score_total, top_n)
+        tile_top = score_from_matrix(matrix, profile, score_total=score_total, top_n=top_n)
+        if best is None:
+            best, best_ids = tile_top, ids[sel]
+        else:
+            merged = pd.concat([best, tile_top], ignore_index=True)
+            merged_ids = np.concatenate([best_ids, ids[sel]])
+            order = np.lexsort((merged_ids, -merged["score_total"].to_numpy(dtype=float)))[:top_n]
+            best, best_ids = merged.iloc[order].reset_index(drop=True), merged_ids[order]
+
+    if writer is not None:
+        writer.close()
+    return best, (Path(out_dir) if out_dir is not None else None)
+
+
+def _count_columns(indexes: dict, cats: list[str], lat, lon, radius_m: float) -> np.ndarray:
+    counts = np.zeros((len(lat), len(cats)), dtype=np.int64)
+    if radius_m < 0:
+        return counts
+    for j, cat in enumerate(cats):
+        counts[:, j] = indexes[cat].count_within(lat, lon, radius_m)
+    return counts
+
+
+def _bound_scores(profile: dict, cats: list[str], hi: np.ndarray, lo: np.ndarray, upper: bool) -> np.ndarray:
+    """
+    Sayım aralığı [lo, hi] bilinen hücreler için skorun üst (upper=True) ya da alt sınırı.
+    Her kategorinin katkısı sayımla monoton: w >= 0 ise artıyor, w < 0 ise azalıyor.
+    Kurallar profile_scores ile aynı (saturating / avoid cezası / must_have).
+    """
+    weights: dict = profile.get("weights", {})
+    must_have = profile.get("must_have", []) or []
+    avoid = set(profile.get("avoid", []) or [])
+
+    w = np.array([float(weights[cat]) for cat in cats], dtype=float)
+    is_avoid = np.array([cat in avoid for cat in cats], dtype=bool)
+
+    pick_hi = (w >= 0) if upper else (w < 0)
+    c = np.where(pick_hi, hi, lo)
+    base = np.where(is_avoid, avoid_penalty(c), saturating_scores(c))
+    score = (base * w).sum(axis=1)
+
+    if must_have:
+        mask_counts = hi if upper else lo
+        ok_mask = np.ones(len(score), dtype=bool)
+        for cat in must_have:
+            if cat not in cats:
+                ok_mask[:] = False
+                break
+            ok_mask &= mask_counts[:, cats.index(cat)] >= 1
+        score = np.where(ok_mask, score, -1e9)
+    return score
+
+
+def score_grid_adaptive(
+    profile: dict,
+    pois: dict[str, pd.DataFrame],
+    cell_km=0.25,
+    top_n=500,
+    coarse_km=2.0,
+    index_backend: str = DEFAULT_BACKEND,
+    bbox=CITY_BBOX,
+    stats: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Kaba -> ince (quadtree) arama ile cell_km grid'inde kesin top_n.
+    1) ~coarse_km'lik bloklardan başla (core.quadtree)
+    2) her blok için skor üst/alt sınırı: blok merkezinde r + h / r - h yarıçaplı sayım
+       (h: merkezden bloktaki en uzak hücre merkezine mesafe)
+    3) alt sınırlardan "top_n. en iyi skor en az T" çıkıyor; üst sınırı T'nin
+       altında kalan bloklar atılıyor, kalanlar 4'e bölünüyor
+    4) tek hücreye inince kalan hücreler gerçek yarıçapla sayılıp skorlanıyor
+    Atılan bir bloktaki her hücre T'den küçük olduğu için sonuç,
+    tüm grid'de score_from_matrix(..., top_n=top_n) ile aynı (eşitlikte hücre sırası dahil).
+    stats verilirse seviye başına bakılan blok sayıları yazılıyor.
+    """
+    if not top_n or top_n <= 0:
+        raise ValueError("score_grid_adaptive için top_n > 0 olmalı")
+
+    radius_m = int(profile.get("radius_m", 1000))
+    grid = Grid(bbox, cell_km, mask=load_land_mask())
+    cats = [cat for cat in profile.get("weights", {}).keys() if cat in pois]
+    indexes = {
+        cat: build_index(pois[cat]["latitude"].to_numpy(), pois[cat]["longitude"].to_numpy(), backend=index_backend)
+        for cat in cats
+    }
+
+    level = top_level(grid.cell_km, coarse_km)
+    R, C = level_nodes(grid, level)
+    threshold = -math.inf
+    visited = []
+    while level > 0:
+        lat, lon, h, n_cells = node_geometry(grid, level, R, C)
+        h_max = float(h.max())
+        hi = _count_columns(indexes, cats, lat, lon, radius_m + h_max)
+        lo = _count_columns(indexes, cats, lat, lon, radius_m - h_max)
+
+        upper = _bound_scores(profile, cats, hi, lo, upper=True)
+        lower = _bound_scores(profile, cats, hi, lo, upper=False)
+        threshold = max(threshold, nth_largest(lower, n_cells, top_n))
+
+        keep = (upper >= threshold) & (n_cells > 0)
+        visited.append((level, len(R), int(keep.sum())))
+        R, C = split(grid, level, R[keep], C[keep])
+        level -= 1
+
+    # seviye 0: R/C direkt ince satır/sütun, sıra = hücre id sırası
+    if grid.keep is not None:
+        on_land = grid.keep[R, C]
+        R, C = R[on_land], C[on_land]
+    ids = R * grid.n_cols + C
+    lat, lon = grid.row_lat[R], grid.col_lon[C]
+    counts = _count_columns(indexes, cats, lat, lon, radius_m).astype(np.int32)
+    visited.append((0, len(ids), len(ids)))
+    if stats is not None:
+        stats["levels"] = visited
+        stats["cells_scored"] = len(ids)
+        stats["cells_total"] = len(grid)
+
+    matrix = CountMatrix(cats, lat, lon, counts, saturating_scores(counts), cell_id=ids)
+    return score_from_matrix(matrix, profile, top_n=top_n)
+
+
 def to_geojson(df: pd.DataFrame, out_path: Path) -> None:
     """
     Streamlit + harita tarafı için GeoJSON çok iş görüyor.
     Burada df -> GeoJSON yazıyoruz.
+    score_breakdown artık json yazısı değil, direkt {kategori: katkı} objesi.
     """
+    view = BreakdownView(df)
+    contrib = view.matrix().tolist()
+    lats = df["latitude"].astype(float).tolist()
+    lons = df["longitude"].astype(float).tolist()
+    scores = df["score_total"].astype(float).tolist()
+    ids = df["target_id"].tolist()
+    names = df["name"].tolist() if "name" in df.columns else [""] * len(df)
+
     feats = []
-    for _, r in df.iterrows():
+    for i in range(len(df)):
         feats.append(
             {
                 "type": "Feature",
-                "geometry": {"type": "Point", "coordinates": [float(r["longitude"]), float(r["latitude"])]},
+                "geometry": {"type": "Point", "coordinates": [lons[i], lats[i]]},
                 "properties": {
-                    "target_id": r["target_id"],
-                    "name": r.get("name", ""),
-                    "score_total": float(r["score_total"]),
-                    "score_breakdown": r.get("score_breakdown", "{}"),
+                    "target_id": ids[i],
+                    "name": names[i],
+                    "score_total": scores[i],
+                    "score_breakdown": dict(zip(view.categories, contrib[i])),
                 },
             }
         )
@@ -267,23 +866,131 @@ def to_geojson(df: pd.DataFrame, out_path: Path) -> None:
     out_path.write_text(json.dumps(geo, ensure_ascii=False), encoding="utf-8")
 
 
-def run_profile(profile: dict, cell_km=1.0, top_n=5000):
+def _atomic_write(path: Path, write_fn) -> Path:
+    # geçici dosya + os.replace: aynı dosyayı okuyan yarım dosya görmesin
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write_fn(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def _write_outputs(df: pd.DataFrame, pid: str, cache=None, key: str | None = None) -> tuple[Path, Path]:
     """
-    App tarafında “butona basınca” çağırmak için bunu tek fonksiyon yaptık.
-    Yani app.py sadece bunu çağırıyor, gerisini burada hallediyoruz.
+    CSV + GeoJSON. cache (core.result_cache.ResultCache) + key verilirse içerik adresli:
+    <key>.csv / <key>.geojson, cache'in sınır/LRU temizliğine tabi (eşzamanlı "custom"
+    kullanıcılar birbirinin dosyasını ezmiyor). Yoksa outputs/scoring/grid_scores_<pid>.*
+    Her iki durumda da yazma atomik.
     """
-    pois = load_pois_for_profile(profile)
-    df = score_grid(profile, pois, cell_km=cell_km)
+    def write_csv(path: Path) -> None:
+        df.to_csv(path, index=False, encoding="utf-8")
 
-    if top_n and len(df) > top_n:
-        df = df.head(top_n).copy()
+    def write_geo(path: Path) -> None:
+        to_geojson(df, path)
+
+    if cache is not None and key is not None:
+        return cache.put_file(key, ".csv", write_csv), cache.put_file(key, ".geojson", write_geo)
+
+    out_csv = _atomic_write(OUT_SCORING / f"grid_scores_{pid}.csv", write_csv)
+    out_geo = _atomic_write(OUT_SCORING / f"grid_scores_{pid}.geojson", write_geo)
+    return out_csv, out_geo
 
+
+# diske yazma işi arka planda: tek thread yeter, sırayla yazsın
+_EXPORT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring-export")
+
+
+def export_outputs_async(df: pd.DataFrame, pid: str, cache=None, key: str | None = None) -> Future:
+    """
+    CSV + GeoJSON'u arka planda yaz; çağıran beklemeden sonucu kullanmaya devam eder.
+    cache + key: içerik adresli yazım (bkz. _write_outputs).
+    Dönüş: (csv, geojson) yollarını veren Future.
+    """
+    return _EXPORT_POOL.submit(_write_outputs, df.copy(), pid, cache, key)
+
+
+def run_profile(
+    profile: dict,
+    cell_km=1.0,
+    top_n=5000,
+    engine=None,
+    in_memory=False,
+    export=True,
+    index_backend: str = DEFAULT_BACKEND,
+    workers: int | None = 1,
+    tile_km: float | None = None,
+    coarse_km: float | None = None,
+    grid_kind: str = "square",
+):
+    """
+    App tarafında “butona basınca” çağırmak için bunu tek fonksiyon yaptık.
+    Yani app.py sadece bunu çağırıyor, gerisini burada hallediyoruz.
+    engine verilirse (scripts.scoring_engine.ScoringEngine) skor onun
+    RAM'deki indeks/küplerinden geliyor.
+
+    in_memory=False: eskisi gibi dosyaları yazıp (csv, geojson) yollarını döndürür.
+    in_memory=True: skorlanmış DataFrame'i direkt döndürür; export=True ise
+    dosyalar arka planda yazılır (beklenmez), export=False ise hiç yazılmaz.
+
+    index_backend="fast" (ya da "kdtree"): izdüşümlü hızlı mesafe (core.geodesy),
+    yarıçap sınırındaki birkaç POI farklı sayılabilir. Varsayılan "exact".
+    workers: sayım matrisi cache'te yoksa kaç process ile hesaplansın
+    (1 = seri, None = tüm çekirdekler). engine verilince kullanılmıyor.
+    Havuz soğuk açılıyor (birkaç sn), küçük işlerde seri yol daha hızlı.
+    tile_km verilirse parça parça skorlama (score_grid_tiled): ince cell_km için,
+    tüm skorlar outputs/scoring/tiles/<profil> altına .npy parçalar olarak yazılıyor.
+    coarse_km verilirse kaba -> ince arama (score_grid_adaptive): sadece top_n
+    olabilecek bölgeler cell_km'ye kadar iniyor, sonuç tam grid'le aynı.
+    grid_kind="hex": altıgen grid (cell_km = kenar); sadece varsayılan yolda,
+    tiled / adaptive / engine kare grid'e bağlı. index_backend="hexring" ile
+    sayım halka toplamından (yaklaşık).
+    profile["nearest"] ({kategori: ağırlık}): en yakın POI mesafesi de skora giriyor
+    (varsayılan yol ve engine; tiled / adaptive'de yok).
+    """
     pid = profile.get("profile_id", "custom")
-    out_csv = OUT_SCORING / f"grid_scores_{pid}.csv"
-    out_geo = OUT_SCORING / f"grid_scores_{pid}.geojson"
+    if grid_kind != "square" and (tile_km or coarse_km or engine is not None):
+        raise ValueError(f"grid_kind={grid_kind!r} sadece varsayılan skorlama yolunda destekleniyor")
+    if profile.get("nearest") and (tile_km or coarse_km):
+        raise ValueError('"nearest" terimleri parça parça / kaba -> ince aramada desteklenmiyor')
+
+    if tile_km:
+        df, _ = score_grid_tiled(
+            profile,
+            load_pois_for_profile(profile),
+            cell_km=cell_km,
+            top_n=top_n,
+            tile_km=tile_km,
+            out_dir=OUT_SCORING / "tiles" / pid,
+            index_backend=index_backend,
+        )
+    elif coarse_km:
+        df = score_grid_adaptive(
+            profile,
+            load_pois_for_profile(profile),
+            cell_km=cell_km,
+            top_n=top_n,
+            coarse_km=coarse_km,
+            index_backend=index_backend,
+        )
+    elif engine is not None:
+        df = engine.score(profile, cell_km=cell_km, top_n=top_n)
+    else:
+        # sayımlar cache'te varsa csv yükleme/mesafe hesabı yok, sadece ağırlık çarpımı
+        matrix = get_count_matrix(
+            profile, cell_km=cell_km, index_backend=index_backend, workers=workers, grid_kind=grid_kind
+        )
+        nearest = profile_nearest(profile, get_grid(cell_km, kind=grid_kind), index_backend=index_backend)
+        df = score_from_matrix(matrix, profile, top_n=top_n, nearest=nearest)
+
+    if in_memory:
+        if export:
+            export_outputs_async(df, pid)
+        return df
 
-    df.to_csv(out_csv, index=False, encoding="utf-8")
-    to_geojson(df, out_geo)
+    out_csv, out_geo = _write_outputs(df, pid)
 
     print(f"[OK] profile={pid} | rows={len(df)}")
     print(df[["target_id", "latitude", "longitude", "score_total"]].head(10).to_string(index=False))
@@ -291,6 +998,80 @@ def run_profile(profile: dict, cell_km=1.0, top_n=5000):
     return out_csv, out_geo
 
 
+def score_surface(
+    profile: dict,
+    cell_km=1.0,
+    engine=None,
+    index_backend: str = DEFAULT_BACKEND,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Tüm grid'in skoru (tablo kurmadan): (cell_id, score_total), top_n yok.
+    Skor yüzeyi rasteri (core.score_raster) için; must_have'e takılanlar -1e9.
+    engine verilirse sayımlar/mesafeler onun RAM'inden (run_profile ile aynı skor).
+    """
+    if engine is not None:
+        return engine.surface(profile, cell_km=cell_km)
+
+    matrix = get_count_matrix(profile, cell_km=cell_km, index_backend=index_backend)
+    nearest = profile_nearest(profile, get_grid(cell_km), index_backend=index_backend)
+    return matrix.cell_id, profile_scores(matrix, profile, nearest=nearest)[4]
+
+
+def score_profiles_batch(profiles: list[dict], cell_km=1.0, top_n=5000, write=True) -> dict:
+    """
+    Birden çok profili tek seferde skorluyoruz (gece preset üretimi için).
+    - tüm profillerin kategorileri birleştirilip csv'ler bir kere yükleniyor
+    - her (kategori seti, radius) için sayım matrisi bir kere hesaplanıyor
+    - her profilin skoru bu ortak matristen profile_scores ile (run_profile ile
+      aynı satır satır toplam; tek BLAS çarpımı son haneyi oynatıp eşit
+      skorların sırasını değiştiriyordu)
+
+    Dönüş: {profile_id: (csv, geojson)} ya da write=False ise {profile_id: df}
+    """
+    cats: list[str] = []
+    for profile in profiles:
+        for cat in profile_categories(profile):
+            if cat not in cats:
+                cats.append(cat)
+
+    loaded: dict[str, pd.DataFrame] = {}
+
+    def _load_all():
+        if not loaded:
+            loaded.update(load_pois(cats))
+        return loaded
+
+    by_radius: dict[int, list[dict]] = {}
+    for profile in profiles:
+        by_radius.setdefault(int(profile.get("radius_m", 1000)), []).append(profile)
+
+    results = {}
+    for radius_m, group in by_radius.items():
+        matrix = _cached_count_matrix(cats, radius_m, cell_km, _load_all)
+
+        for profile in group:
+            nearest = profile_nearest(profile, get_grid(cell_km), _load_all() if profile.get("nearest") else None)
+            df = score_from_matrix(matrix, profile, top_n=top_n, nearest=nearest)
+
+            pid = profile.get("profile_id", "custom")
+            results[pid] = _write_outputs(df, pid) if write else df
+            print(f"[OK] profile={pid} | radius={radius_m} | rows={len(df)}")
+
+    return results
+
+
+def profiles_from_personas() -> list[dict]:
+    """
+    core/persona_poi_weights içindeki persona ağırlıklarını profil formatına çeviriyoruz.
+    """
+    from core.persona_poi_weights import PERSONA_POI_WEIGHTS
+
+    return [
+        {"profile_id": persona, "profile_name": persona, "radius_m": 1000, "weights": dict(weights)}
+        for persona, weights in PERSONA_POI_WEIGHTS.items()
+    ]
+
+
 def load_profiles_json() -> list[dict]:
     """
     Preset profil seçme modu için.
@@ -302,8 +1083,54 @@ def load_profiles_json() -> list[dict]:
 
 def main():
     # Terminalden test etmek istersek diye örnek main bıraktım.
+    #   python scripts/scoring_grid.py             -> ilk profil
+    #   python scripts/scoring_grid.py --all       -> tüm presetler (tek geçiş)
+    #   python scripts/scoring_grid.py --personas  -> tüm personalar (tek geçiş)
+    #   python scripts/scoring_grid.py --fast      -> ilk profil, hızlı (izdüşümlü) mesafe
+    #   python scripts/scoring_grid.py --fft       -> ilk profil, sayım FFT yoğunluk rasterinden
+    #   python scripts/scoring_grid.py --workers=8 -> ilk profil, sayım 8 process ile
+    #   python scripts/scoring_grid.py --tiled     -> ilk profil, 0.1 km grid, parça parça
+    #   python scripts/scoring_grid.py --adaptive  -> ilk profil, 0.25 km grid, kaba -> ince top 500
+    #   python scripts/scoring_grid.py --hex       -> ilk profil, kenarı 0.5 km altıgen grid
+    args = sys.argv[1:]
+    if "--all" in args or "--personas" in args:
+        profiles = load_profiles_json() if "--all" in args else profiles_from_personas()
+        for pid, (out_csv, out_geo) in score_profiles_batch(profiles, cell_km=1.0, top_n=5000).items():
+            print(pid, out_csv, out_geo)
+        return
+
     profiles = load_profiles_json()
-    out_csv, out_geo = run_profile(profiles[0], cell_km=1.0, top_n=5000)
+    backend = "fast" if "--fast" in args else DEFAULT_BACKEND
+    if "--fft" in args:
+        backend = FFT_BACKEND
+    workers = 1
+    for a in args:
+        if a.startswith("--workers="):
+            workers = int(a.split("=", 1)[1]) or None
+    if workers != 1 and backend not in RASTER_BACKENDS and "--adaptive" not in args and "--tiled" not in args:
+        # havuzun soğuk açılışı sayım süresine karışmasın
+        t0 = time.time()
+        cell_km, grid_kind = (0.5, "hex") if "--hex" in args else (1.0, "square")
+        n = warm_pool(workers, cell_km=cell_km, grid_kind=grid_kind, index_backend=backend)
+        print(f"[OK] {n} worker hazır | {time.time() - t0:.1f} sn")
+    if "--adaptive" in args:
+        out_csv, out_geo = run_profile(profiles[0], cell_km=0.25, top_n=500, index_backend=backend, coarse_km=2.0)
+        print(out_csv, out_geo)
+        return
+
+    if "--hex" in args:
+        out_csv, out_geo = run_profile(
+            profiles[0], cell_km=0.5, top_n=5000, index_backend=backend, workers=workers, grid_kind="hex"
+        )
+        print(out_csv, out_geo)
+        return
+
+    if "--tiled" in args:
+        out_csv, out_geo = run_profile(profiles[0], cell_km=0.1, top_n=5000, index_backend=backend, tile_km=TILE_KM)
+        print(out_csv, out_geo)
+        return
+
+    out_csv, out_geo = run_profile(profiles[0], cell_km=1.0, top_n=5000, index_backend=backend, workers=workers)
     print(out_csv, out_geo)
 
 
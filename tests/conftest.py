@@ -0,0 +1,9 @@
+# tests/conftest.py
+# scripts/ ve core/ importları için repo kökü path'te olsun (scriptlerdeki gibi)
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
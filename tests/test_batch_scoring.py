@@ -0,0 +1,29 @@
+# tests/test_batch_scoring.py
+"""
+Gece preset üretimi (score_profiles_batch) app'in gösterdiğiyle (run_profile)
+aynı hücreleri, aynı sırada, aynı skorla vermeli.
+"""
+import numpy as np
+import pytest
+
+from scripts.scoring_grid import load_profiles_json, run_profile, score_profiles_batch
+
+
+@pytest.fixture(scope="module")
+def presets():
+    profiles = load_profiles_json()
+    if not profiles:
+        pytest.skip("user_profiles.json'da preset yok")
+    return profiles
+
+
+@pytest.mark.parametrize("cell_km, top_n", [(1.0, 5000), (0.5, 1000)])
+def test_batch_matches_run_profile(presets, cell_km, top_n):
+    batch = score_profiles_batch(presets, cell_km=cell_km, top_n=top_n, write=False)
+
+    for profile in presets:
+        pid = profile["profile_id"]
+        single = run_profile(profile, cell_km=cell_km, top_n=top_n, in_memory=True, export=False)
+
+        assert batch[pid]["target_id"].tolist() == single["target_id"].tolist(), pid
+        np.testing.assert_array_equal(batch[pid]["score_total"].to_numpy(), single["score_total"].to_numpy(), err_msg=pid)
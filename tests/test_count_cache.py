@@ -0,0 +1,44 @@
+# tests/test_count_cache.py
+"""
+Sayım matrisi disk cache'i: aynı anahtara eşzamanlı yazma ve disk LRU'su.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from core.count_cache import CountMatrix, CountMatrixCache
+
+
+def _matrix(n: int = 50, seed: int = 0) -> CountMatrix:
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 10, size=(n, 2))
+    return CountMatrix(["a", "b"], rng.random(n), rng.random(n), counts, counts / 10.0)
+
+
+def test_concurrent_put_same_key(tmp_path):
+    # streamlit oturumları aynı process'te thread: aynı anahtara aynı anda yazabiliyorlar
+    cache = CountMatrixCache(tmp_path)
+    m = _matrix()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: cache.put("k", m), range(32)))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["counts_k.npz"]
+    cache.clear_memory()
+    np.testing.assert_array_equal(cache.get("k").counts, m.counts)
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    cache = CountMatrixCache(tmp_path, max_entries=2)
+    for i, key in enumerate(("a", "b")):
+        cache.put(key, _matrix(seed=i))
+        past = time.time() - 100 + i
+        os.utime(tmp_path / f"counts_{key}.npz", (past, past))
+
+    cache.clear_memory()
+    assert cache.get("a") is not None  # "a" yeniden kullanıldı, "b" en eski
+    cache.put("c", _matrix(seed=2))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["counts_a.npz", "counts_c.npz"]
+    assert cache.evictions == 1
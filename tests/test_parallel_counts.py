@@ -0,0 +1,32 @@
+# tests/test_parallel_counts.py
+"""
+Process havuzlu sayım (core.parallel_counts) seri yolla birebir aynı olmalı.
+"""
+import numpy as np
+import pytest
+
+from core.parallel_counts import shutdown_pools
+from scripts.scoring_grid import build_count_matrix, load_pois_for_profile, load_profiles_json
+
+
+@pytest.fixture(scope="module")
+def preset_pois():
+    profiles = load_profiles_json()
+    if not profiles:
+        pytest.skip("user_profiles.json'da preset yok")
+    pois = load_pois_for_profile(profiles[0])
+    if not pois:
+        pytest.skip("preset için POI verisi yok")
+    yield pois
+    shutdown_pools()
+
+
+@pytest.mark.parametrize("grid_kind, cell_km", [("square", 1.0), ("hex", 1.0)])
+def test_parallel_matches_serial(preset_pois, grid_kind, cell_km):
+    serial = build_count_matrix(preset_pois, 1000, cell_km=cell_km, workers=1, grid_kind=grid_kind)
+    parallel = build_count_matrix(preset_pois, 1000, cell_km=cell_km, workers=2, grid_kind=grid_kind)
+
+    assert parallel.categories == serial.categories
+    assert parallel.counts.dtype == serial.counts.dtype
+    np.testing.assert_array_equal(parallel.counts, serial.counts)
+    np.testing.assert_array_equal(parallel.saturated, serial.saturated)
@@ -0,0 +1,38 @@
+# tests/test_result_cache.py
+"""
+Sonuç cache'i: okunamayan pickle request'i düşürmemeli, miss sayılmalı.
+"""
+import pickle
+
+import pandas as pd
+import pytest
+
+from core.result_cache import ResultCache
+
+
+class _Gone:
+    pass
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"",  # boş dosya -> EOFError
+        b"not a pickle at all",  # UnpicklingError
+        pickle.dumps(pd.DataFrame({"a": [1, 2, 3]}))[:20],  # yarım yazılmış
+        pickle.dumps(_Gone()).replace(b"_Gone", b"_Nope"),  # sınıf yok -> AttributeError
+        pickle.dumps(_Gone()).replace(b"test_result_cache", b"no_such_module_x"),  # ImportError
+    ],
+    ids=["empty", "garbage", "truncated", "missing_class", "missing_module"],
+)
+def test_corrupt_frame_is_a_miss(tmp_path, payload):
+    cache = ResultCache(tmp_path)
+    cache.path("k", ".pkl").write_bytes(payload)
+
+    assert cache.get_frame("k") is None
+    assert cache.misses == 1
+    assert not cache.path("k", ".pkl").exists()
+
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    cache.put_frame("k", df)
+    pd.testing.assert_frame_equal(cache.get_frame("k"), df)
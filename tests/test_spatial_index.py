@@ -0,0 +1,69 @@
+# tests/test_spatial_index.py
+"""
+BallTree indeksli sayım (count_within_radius) skaler haversine döngüsüyle
+birebir aynı olmalı: haversine_m(hücre, POI) <= radius_m, sınır dahil.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.geodesy import haversine_m
+from core.grid import get_grid
+from core.spatial_index import DEFAULT_BACKEND, build_index
+from scripts.scoring_grid import INPUTS, count_within_radius, load_pois
+
+CATEGORIES = ("cafe_main", "park_main")
+RADII_M = (300, 1000, 2500)
+N_CELLS = 120
+N_POIS = 250
+
+
+def _loop_counts(cells: pd.DataFrame, poi: pd.DataFrame, radius_m: float) -> np.ndarray:
+    # eski yol: hücre hücre, POI POI skaler mesafe
+    out = np.zeros(len(cells), dtype=np.int64)
+    for i, (clat, clon) in enumerate(zip(cells["latitude"], cells["longitude"])):
+        for plat, plon in zip(poi["latitude"], poi["longitude"]):
+            if haversine_m(float(clat), float(clon), float(plat), float(plon)) <= radius_m:
+                out[i] += 1
+    return out
+
+
+@pytest.fixture(scope="module")
+def sample():
+    missing = [c for c in CATEGORIES if not INPUTS[c].exists()]
+    if missing:
+        pytest.skip(f"kategori verisi yok: {missing}")
+    pois = load_pois(list(CATEGORIES))
+    poi = pd.concat([pois[c] for c in CATEGORIES], ignore_index=True)[["latitude", "longitude"]]
+
+    # sabit örnek: her çalıştırmada aynı hücreler / POI'ler
+    rng = np.random.default_rng(7)
+    grid = get_grid(1.0)
+    cell_sel = np.sort(rng.choice(len(grid), size=N_CELLS, replace=False))
+    poi_sel = np.sort(rng.choice(len(poi), size=N_POIS, replace=False))
+    cells = pd.DataFrame({"latitude": grid.latitude[cell_sel], "longitude": grid.longitude[cell_sel]})
+    return cells, poi.iloc[poi_sel].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("radius_m", RADII_M)
+def test_balltree_matches_haversine_loop(sample, radius_m):
+    cells, poi = sample
+    assert build_index(poi["latitude"], poi["longitude"]).name == DEFAULT_BACKEND == "balltree"
+
+    expected = _loop_counts(cells, poi, radius_m)
+    assert expected.sum() > 0
+    np.testing.assert_array_equal(count_within_radius(cells, poi, radius_m), expected)
+
+
+def test_poi_exactly_on_boundary(sample):
+    cells, poi = sample
+    cell = cells.iloc[[0]].reset_index(drop=True)
+    target = poi.iloc[[0]].reset_index(drop=True)
+    d = haversine_m(
+        float(cell["latitude"][0]), float(cell["longitude"][0]), float(target["latitude"][0]), float(target["longitude"][0])
+    )
+
+    # yarıçap tam mesafe: dahil; bir ulp eksik: hariç
+    assert count_within_radius(cell, target, d).tolist() == [1]
+    assert count_within_radius(cell, target, np.nextafter(d, 0.0)).tolist() == [0]
+    np.testing.assert_array_equal(count_within_radius(cells, poi, d), _loop_counts(cells, poi, d))